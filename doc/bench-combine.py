@@ -0,0 +1,99 @@
+# file: bench-combine.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Check and time lines.combine_segments on random sets of squares.
+
+Every square is drawn as four loose lines with slightly jittered endpoints,
+in random order and direction. For small sizes the result is compared with
+the original O(n²) implementation.
+
+Run from the root directory of the repository. An optional argument gives
+the largest number of segments to try, e.g. 1000000.
+"""
+
+import copy
+import random
+import sys
+import time
+
+sys.path.insert(1, ".")
+
+from nctools import lines  # noqa
+
+
+def old_combine_segments(segments):
+    def grow(segment, addition):
+        if lines._eq(segment[-1], addition[0]):
+            return segment + addition[1:]
+        elif lines._eq(segment[-1], addition[-1]):
+            return segment + list(reversed(addition[:-1]))
+        elif lines._eq(segment[0], addition[-1]):
+            return addition[:-1] + segment
+        elif lines._eq(segment[0], addition[0]):
+            return list(reversed(addition[1:])) + segment
+        else:
+            raise ValueError("addition doesn't fit segment")
+
+    openseg = []
+    loops = []
+    first = None
+    segments = copy.deepcopy(segments)
+    while len(segments) > 0:
+        if not first:
+            first = segments.pop(0)
+        for second in segments:
+            try:
+                first = grow(first, second)
+                segments.remove(second)
+                if lines.closed(first):
+                    loops.append(first)
+                    first = None
+                break
+            except ValueError:
+                continue
+        else:
+            openseg.append(first)
+            first = None
+    if first:
+        openseg.append(first)
+    return loops, openseg
+
+
+def squares(n):
+    """Make n/4 squares as loose lines, plus some loose ends."""
+    rnd = random.Random(n)
+    j = lines.EPSILON / 3
+
+    def jit(p):
+        return (p[0] + rnd.uniform(-j, j), p[1] + rnd.uniform(-j, j))
+
+    side = int((n / 4) ** 0.5) + 1
+    seg = []
+    for k in range(n // 4):
+        x, y = (k % side) * 20.0, (k // side) * 20.0
+        c = [(x, y), (x + 10, y), (x + 10, y + 10), (x, y + 10)]
+        for a, b in zip(c, c[1:] + c[:1]):
+            s = [jit(a), jit(b)]
+            if rnd.random() < 0.5:
+                s.reverse()
+            seg.append(s)
+    rnd.shuffle(seg)
+    return seg
+
+
+limit = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+for n in (1000, 4000, 10000, 100000, 1000000):
+    if n > limit:
+        break
+    seg = squares(n)
+    t = time.perf_counter()
+    rv = lines.combine_segments(seg)
+    dt = time.perf_counter() - t
+    line = f"{n:8d} segments: {dt:8.3f} s, {dt / n * 1e6:6.2f} µs/segment"
+    if n <= 4000:
+        t = time.perf_counter()
+        ev = old_combine_segments(seg)
+        dt = time.perf_counter() - t
+        assert rv == ev
+        line += f", original: {dt:8.3f} s (same result)"
+    print(line)
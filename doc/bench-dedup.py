@@ -0,0 +1,71 @@
+# file: bench-dedup.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Time lines.dedup and lines.common, and lines.combine_segments for comparison.
+
+The sets are long straight lines that partly overlap, random short segments
+of which some are drawn twice, and the layers of the files in testfiles/.
+For lines.common, every set is split into ten layers.
+
+Run from the root directory of the repository.
+"""
+
+import glob
+import random
+import sys
+import time
+
+sys.path.insert(1, ".")
+
+from nctools import cache, lines  # noqa
+
+
+def timed(f, seg):
+    t = time.perf_counter()
+    f(seg)
+    return time.perf_counter() - t
+
+
+def longlines(n):
+    """Make n lines of 3 m; every other line overlaps the one before it."""
+    rnd = random.Random(n)
+    seg = []
+    for k in range(n // 2):
+        y = rnd.uniform(0, 1500)
+        x = rnd.uniform(0, 1000)
+        seg.append([(x, y), (x + 3000, y)])
+        seg.append([(x + 4000, y), (x + 1000, y)])
+    return seg
+
+
+def randomlines(n):
+    """Make n random segments of up to 100 mm; one in ten is drawn twice."""
+    rnd = random.Random(n)
+    seg = []
+    for _ in range(n):
+        if seg and rnd.random() < 0.1:
+            seg.append(list(reversed(rnd.choice(seg))))
+            continue
+        x, y = rnd.uniform(0, 3000), rnd.uniform(0, 1500)
+        seg.append([(x, y), (x + rnd.uniform(-100, 100), y + rnd.uniform(-100, 100))])
+    return seg
+
+
+sets = [("200 lines of 3 m", longlines(200))]
+sets.append(("20000 random lines", randomlines(20000)))
+files = [
+    [list(s) for s in cache.segments(f).values()]
+    for f in sorted(glob.glob("testfiles/*.dxf"))
+]
+
+for name, seg in sets:
+    d = timed(lines.dedup, seg)
+    m = timed(lines.common, [seg[k::10] for k in range(10)])
+    c = timed(lines.combine_segments, seg)
+    print(f"{name}: dedup {d:.3f} s, common {m:.3f} s, combine_segments {c:.3f} s")
+n = sum(len(layers) for layers in files)
+d = sum(timed(lines.dedup, s) for layers in files for s in layers)
+m = sum(timed(lines.common, layers) for layers in files)
+c = sum(timed(lines.combine_segments, s) for layers in files for s in layers)
+print(f"testfiles, {n} layers: dedup {d:.3f} s, common {m:.3f} s, ", end="")
+print(f"combine_segments {c:.3f} s")
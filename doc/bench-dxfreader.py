@@ -0,0 +1,28 @@
+# file: bench-dxfreader.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Compare the text and mmap backends of dxfreader on the files in testfiles/.
+
+Run from the root directory of the repository.
+"""
+
+import glob
+import sys
+import timeit
+
+sys.path.insert(1, ".")
+
+from nctools import dxfreader as dx  # noqa
+
+files = sorted(glob.glob("testfiles/*.dxf"))
+rep = 20
+
+for backend in ("text", "mmap"):
+    t = timeit.timeit(lambda: [dx.parse(f, backend=backend) for f in files], number=rep)
+    print(f"parse, {backend}: {t / rep * 1000:.1f} ms for {len(files)} files")
+
+for backend in ("text", "mmap"):
+    t = timeit.timeit(
+        lambda: [dx.readentities(f, backend=backend) for f in files], number=rep
+    )
+    print(f"readentities, {backend}: {t / rep * 1000:.1f} ms for {len(files)} files")
@@ -0,0 +1,40 @@
+# file: bench-entity.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Compare group code lookups on plain tuples and on dxfreader.Entity.
+
+Run from the root directory of the repository.
+"""
+
+import glob
+import sys
+import timeit
+
+sys.path.insert(1, ".")
+
+from nctools import dxfreader as dx  # noqa
+from nctools import lines  # noqa
+
+files = sorted(glob.glob("testfiles/*.dxf"))
+indexed = [e for f in files for e in dx.readentities(f)]
+plain = [tuple(e) for e in indexed]
+rep = 20
+print(f"{len(indexed)} entities from {len(files)} files")
+
+
+def lookups(entities):
+    for e in entities:
+        dx.bycode(e, 0)
+        dx.layername(e)
+        dx.bycode(e, 10)
+        dx.bycode(e, 20)
+        dx.bycode(e, 11)
+        dx.bycode(e, 21)
+
+
+for name, ents in (("tuple", plain), ("Entity", indexed)):
+    t = timeit.timeit(lambda: lookups(ents), number=rep) / rep
+    print(f"lookups, {name}: {t / len(ents) * 1e6:.2f} µs per entity")
+for name, ents in (("tuple", plain), ("Entity", indexed)):
+    t = timeit.timeit(lambda: lines.mksegments(ents), number=rep) / rep
+    print(f"mksegments, {name}: {t * 1000:.1f} ms")
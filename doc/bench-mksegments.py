@@ -0,0 +1,44 @@
+# file: bench-mksegments.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Time lines.mksegments on random arcs, with and without numpy.
+
+Run from the root directory of the repository.
+"""
+
+import random
+import sys
+import timeit
+
+sys.path.insert(1, ".")
+
+from nctools import dxfreader as dx  # noqa
+from nctools import lines  # noqa
+
+rnd = random.Random(1)
+entities = []
+for _ in range(3000):
+    cx, cy = rnd.uniform(-500, 500), rnd.uniform(-500, 500)
+    R, sa, ea = rnd.uniform(0.1, 800), rnd.uniform(0, 360), rnd.uniform(0, 360)
+    entities.append(
+        dx.Entity(
+            [(0, "ARC"), (8, "deel 1"), (10, cx), (20, cy), (40, R), (50, sa), (51, ea)]
+        )
+    )
+for _ in range(300):
+    pairs = [(0, "LWPOLYLINE"), (8, "deel 1"), (70, "1")]
+    for _ in range(20):
+        pairs += [(10, rnd.uniform(-500, 500)), (20, rnd.uniform(-500, 500))]
+        if rnd.random() < 0.5:
+            pairs.append((42, rnd.uniform(0.05, 1)))
+    entities.append(dx.Entity(pairs))
+
+rep = 5
+npoints = sum(len(s) for s in lines.mksegments(entities))
+print(f"{len(entities)} entities, {npoints} points")
+if lines.np is not None:
+    t = timeit.timeit(lambda: lines.mksegments(entities), number=rep) / rep
+    print(f"with numpy: {t * 1000:.1f} ms")
+lines.np = None
+t = timeit.timeit(lambda: lines.mksegments(entities), number=rep) / rep
+print(f"without numpy: {t * 1000:.1f} ms")
@@ -0,0 +1,59 @@
+# file: bench-writer.py
+# vim:fileencoding=utf-8:ft=python
+"""
+Time gerbernc.Writer on all segments of the test files.
+
+Compares calling moveto for every point with cut_polyline, and reports the
+number of commands that each writes.
+
+Run from the root directory of the repository.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(1, ".")
+
+from nctools import cache, gerbernc  # noqa
+
+segments = []
+for fn in sorted(glob.glob("testfiles/*.dxf")):
+    for seg in cache.segments(fn).values():
+        segments += seg.tolist()
+segments *= 10
+
+
+def pointwise():
+    w = gerbernc.Writer(path)
+    for s in segments:
+        w.moveto(*s[0])
+        w.down()
+        for p in s[1:]:
+            w.moveto(*p)
+        w.up()
+    w.write()
+
+
+def polylines():
+    w = gerbernc.Writer(path)
+    for s in segments:
+        w.cut_polyline(s)
+    w.write()
+
+
+fd, path = tempfile.mkstemp()
+os.close(fd)
+for func in (pointwise, polylines):
+    best = None
+    for _ in range(20):
+        start = time.process_time()
+        func()
+        t = time.process_time() - start
+        best = t if best is None else min(best, t)
+    with open(path) as f:
+        count = f.read().count("*")
+    print(f"{func.__name__}: {count} commands, {best*1000:.1f} ms")
+os.remove(path)
@@ -0,0 +1,196 @@
+# file: cache.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+# Created: 2026-10-18T10:12:40+0200
+# Last modified: 2026-10-18T10:12:40+0200
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY AUTHOR AND CONTRIBUTORS "AS IS" AND ANY EXPRESS
+# OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN
+# NO EVENT SHALL AUTHOR OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Persistent cache of flattened DXF files.
+
+Parsing a big DXF file and flattening its entities into line segments takes
+time. This module stores the segments per layer in a cache directory, so that
+running several programs on the same file only has to do that once.
+
+Cache entries are keyed by the SHA-256 hash of the file contents and the
+settings that influence the segments. The total size of the cache is bounded;
+the least recently used entries are removed first.
+"""
+
+import array
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from nctools import dxfreader as dx
+from nctools import lines
+
+# Change this when the output of lines.mksegments or the file layout changes.
+FORMAT = 4
+MAGIC = b"NCSEG"
+MAXSIZE = 256 * 2**20  # bytes
+SUFFIX = ".seg"
+
+
+def key(path, alllayers=False, ndigits=3):
+    """
+    Calculate the cache key for a DXF file.
+
+    Arguments:
+        path: Name of the DXF file.
+        alllayers: True if all layers are flattened, not just the numbered ones.
+        ndigits: Number of digits that coordinates are rounded to.
+
+    Returns:
+        A hexadecimal string.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            h.update(block)
+    settings = (FORMAT, sys.byteorder, lines.DEVLIM, lines.EPSILON, ndigits, alllayers)
+    h.update(repr(settings).encode("ascii"))
+    return h.hexdigest()
+
+
+def dump(bylayer, f):
+    """
+    Write flattened layers to a binary file.
+
+    For every layer the name and the offsets and coordinates arrays of the
+    segments (see lines.Segments) are written.
+
+    Arguments:
+        bylayer: Dictionary mapping layer names to lines.Segments instances
+            or lists of segments.
+        f: File opened for writing in binary mode.
+    """
+    f.write(MAGIC)
+    f.write(struct.pack("<I", len(bylayer)))
+    for name, segments in bylayer.items():
+        if not isinstance(segments, lines.Segments):
+            segments = lines.Segments(segments)
+        bname = name.encode("utf-8")
+        f.write(struct.pack("<II", len(bname), len(segments)))
+        f.write(bname)
+        segments.offsets.tofile(f)
+        segments.coords.tofile(f)
+
+
+def load(f):
+    """
+    Read flattened layers from a binary file written by dump.
+
+    Arguments:
+        f: File opened for reading in binary mode.
+
+    Returns:
+        A dictionary mapping layer names to lines.Segments instances.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a segment cache file")
+    (nlayers,) = struct.unpack("<I", f.read(4))
+    bylayer = {}
+    for _ in range(nlayers):
+        namelen, nseg = struct.unpack("<II", f.read(8))
+        name = f.read(namelen).decode("utf-8")
+        offsets = array.array("q")
+        offsets.fromfile(f, nseg + 1)
+        coords = array.array("d")
+        coords.fromfile(f, 2 * offsets[-1])
+        bylayer[name] = lines.Segments.fromarrays(coords, offsets)
+    return bylayer
+
+
+def evict(cachedir, maxsize=MAXSIZE):
+    """
+    Remove the least recently used cache entries until the cache fits.
+
+    Arguments:
+        cachedir: The cache directory.
+        maxsize: Maximum total size of the cache entries in bytes.
+    """
+    entries = []
+    with os.scandir(cachedir) as it:
+        for entry in it:
+            if entry.name.endswith(SUFFIX) and entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    entries.sort()
+    total = sum(e[1] for e in entries)
+    for _, size, path in entries:
+        if total <= maxsize:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def segments(path, alllayers=False, cachedir=None, maxsize=MAXSIZE, ndigits=3):
+    """
+    Read a DXF file and flatten its entities into segments per layer.
+
+    If cachedir is given, the result is looked up in or added to the cache
+    there. On a hit the DXF file is only read to calculate its hash.
+
+    Arguments:
+        path: Name of the DXF file.
+        alllayers: Flatten all layers instead of only the numbered layers.
+        cachedir: Cache directory, or None to not use the cache.
+        maxsize: Maximum total size of the cache in bytes.
+        ndigits: Rounds coordinates to ndigits after the decimal point.
+
+    Returns:
+        A dictionary mapping layer names to lines.Segments instances.
+        Numbered layers are sorted by number, other layers by name.
+    """
+    if cachedir:
+        fn = os.path.join(cachedir, key(path, alllayers, ndigits) + SUFFIX)
+        try:
+            with open(fn, "rb") as f:
+                bylayer = load(f)
+            os.utime(fn)  # Mark as recently used.
+            return bylayer
+        except (OSError, ValueError, EOFError, struct.error):
+            pass
+    entities = dx.readentities(path, backend="mmap")
+    index = dx.layerindex(entities)
+    if alllayers:
+        names = sorted(index)
+    else:
+        names = dx.numbered(index)
+    bylayer = {nm: lines.mksegments(index[nm], ndigits, True) for nm in names}
+    if cachedir:
+        os.makedirs(cachedir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cachedir, delete=False) as f:
+            try:
+                dump(bylayer, f)
+            except Exception:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, fn)
+        evict(cachedir, maxsize)
+    return bylayer
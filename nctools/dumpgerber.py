@@ -8,6 +8,7 @@
 
 import argparse
 import sys
+from nctools import gerbernc
 from nctools import __VERSION__, __LICENSE__
 
 eof = "end of file"
@@ -88,26 +89,26 @@ def main():
     """
     args = process_arguments()
     for fn in args.files:
-        with open(fn) as df:
-            data = df.read()
         print("/Reading file '{}'./".format(fn))
-        items = data.split("*")
-        if len(items[-1]) == 0:
-            del items[-1]
-        print("/This file contains {} blocks./".format(len(items)))
-        for cmd in items:
-            if cmd in simple:
-                print("{:20s} /{}/".format(cmd, simple[cmd]))
-            elif cmd[0] in withargs:
-                arg = withargs[cmd[0]].format(cmd[1:])
-                print("{:20s} /{}/".format(cmd, arg))
-            elif cmd.startswith("X"):
-                x, y = cmd[1:].split("Y")
-                x, y = round(float(x) * 25.4 / 100, 0), round(float(y) * 25.4 / 100, 0)
+        count = 0
+        for cmd in gerbernc.read(fn):
+            count += 1
+            text = cmd.text
+            if text in simple:
+                print("{:20s} /{}/".format(text, simple[text]))
+            elif text[0] in withargs:
+                arg = withargs[text[0]].format(text[1:])
+                print("{:20s} /{}/".format(text, arg))
+            elif cmd.kind == "move":
+                x, y = (round(float(j) * 25.4 / 100, 0) for j in cmd.args)
                 fs = "{:20s} /move to x = {:.0f} mm, y = {:.0f} mm/"
-                print(fs.format(cmd, x, y))
+                print(fs.format(text, x, y))
+            elif cmd.kind == "bite":
+                length = round(cmd.args[1] * 25.4 / 100, 1)
+                print("{:20s} /bite length {:.1f} mm/".format(text, length))
             else:
-                print(cmd)
+                print(text)
+        print("/This file contains {} blocks./".format(count))
 
 
 if __name__ == "__main__":
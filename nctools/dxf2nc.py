@@ -10,8 +10,7 @@
 import argparse
 import logging
 import sys
-from nctools import dxfreader as dx
-from nctools import lines, gerbernc, utils
+from nctools import cache, lines, gerbernc, machine, optimize, utils
 from nctools import __VERSION__, __LICENSE__
 
 _CP = f"""dxf2nc {__VERSION__}
@@ -27,15 +26,127 @@ class LicenseAction(argparse.Action):
         sys.exit()
 
 
-def cut_contours(seg, w, layer, keyfunc):
+def deduplicated(seg, layer):
+    """Remove cuts that are made twice, and report the length saved."""
+    rv, removed = lines.dedup(seg)
+    fs = 'removed {:.0f} mm of duplicate cuts in layer "{}"'
+    logging.info(fs.format(removed, layer))
+    return rv
+
+
+def shared(bylayer):
+    """Cut edges that layers share only once, in the first of those layers."""
+    parts, removed = lines.common(list(bylayer.values()))
+    logging.info("common lines save {:.0f} mm of cutting".format(removed))
+    return dict(zip(bylayer.keys(), parts))
+
+
+def contours(seg, layer):
     """Assemble segments into contours before cutting them."""
     closedseg, openseg = lines.combine_segments(seg)
     fs = '{} {} segments in layer "{}"'
     for a, b in (("closed", closedseg), ("open", openseg)):
         logging.info(fs.format(len(b), a, layer))
-    allseg = openseg + closedseg
-    allseg.sort(key=keyfunc)
-    cut_segments(allseg, w)
+    return openseg + closedseg
+
+
+def optimized(seg, start, timelimit):
+    """
+    Put segments in the order with the least travel between cuts.
+
+    Arguments:
+        seg: List of line segments.
+        start: Position of the cutting head in mm.
+        timelimit: Maximum time to spend on 2-opt, in seconds.
+
+    Returns:
+        The ordered list of segments.
+    """
+    before = optimize.travel(sorted(seg, key=utils.bbxykey), start)
+    rv = optimize.order(seg, start, timelimit)
+    after = optimize.travel(rv, start)
+    fs = "travel {:.0f} mm with 'xy' sorting, {:.0f} mm optimized"
+    logging.info(fs.format(before, after))
+    return rv
+
+
+def simplified(seg, anglim):
+    """
+    Remove points that deviate little from a straight cut.
+
+    Arguments:
+        seg: List of line segments.
+        anglim: Angle in degrees where the knife is lifted.
+
+    Returns:
+        The list of simplified segments.
+    """
+    rv = [lines.simplify(s, anglim=anglim) for s in seg]
+    before = sum(len(s) for s in seg)
+    after = sum(len(s) for s in rv)
+    logging.info("simplifying reduced {} moves to {}".format(before, after))
+    return rv
+
+
+def nested(seg):
+    """
+    Cut segments inside closed contours before those contours.
+
+    Arguments:
+        seg: List of line segments, in cutting order.
+
+    Returns:
+        The reordered list of segments.
+    """
+    rv, count = optimize.innerfirst(seg)
+    logging.info("{} segments lie inside closed contours".format(count))
+    return rv
+
+
+def entered(seg, start, corner):
+    """
+    Start closed segments at the vertex nearest to the end of the previous cut.
+
+    Arguments:
+        seg: List of line segments, in cutting order.
+        start: Position of the cutting head in mm.
+        corner: Minimum angle in degrees of preferred start points, or None.
+
+    Returns:
+        The list of segments with new start points.
+    """
+    before = optimize.travel(seg, start)
+    rv = optimize.startpoints(seg, start, corner)
+    after = optimize.travel(rv, start)
+    logging.info("start points save {:.0f} mm of travel".format(before - after))
+    return rv
+
+
+def drill_holes(seg, radius, w, start):
+    """
+    Drill small circles instead of cutting them.
+
+    Arguments:
+        seg: List of line segments.
+        radius: Largest radius in mm of the circles to drill.
+        w: gerbernc.Writer instance
+        start: Position of the cutting head in mm.
+
+    Returns:
+        The list of segments that remain to be cut, and the position of the
+        last hole (or start).
+    """
+    rest, holes = [], []
+    for s in seg:
+        c = lines.circle(s)
+        if c and c[1] <= radius:
+            holes.append([c[0]])
+        else:
+            rest.append(s)
+    for h in optimize.nearest(holes, start):
+        w.drill(*h[0])
+        start = h[0]
+    return rest, start
 
 
 def cut_segments(seg, w):
@@ -47,11 +158,35 @@ def cut_segments(seg, w):
         w: gerbernc.Writer instance
     """
     for s in seg:
-        w.moveto(*s[0])
-        w.down()
-        for p in s[1:]:
-            w.moveto(*p)
-        w.up()
+        w.cut_polyline(s)
+
+
+def positive(text):
+    """Convert a command line argument to a positive float."""
+    value = float(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("{} is not positive".format(text))
+    return value
+
+
+def bitelength(window, params):
+    """
+    Check the length of the cutting window against the bite limits of the
+    machine, and round it to the resolution of the controller.
+
+    Arguments:
+        window: Length of the cutting window in mm.
+        params: Dict of machine parameters, or None for the defaults.
+
+    Returns:
+        The bite length in mm.
+    """
+    low, high, first = machine.bitelimits(params)
+    length = round(window * 100 / 25.4) * 0.254
+    if length < max(low, first) or length > high:
+        fs = "window {:.1f} mm is outside the bite limits of {:.1f}-{:.1f} mm"
+        raise ValueError(fs.format(window, max(low, first), high))
+    return length
 
 
 def process_arguments():
@@ -74,6 +209,28 @@ def process_arguments():
     parser.add_argument(
         "-c", "--contours", help=argtxt4, dest="contours", action="store_true"
     )
+    parser.add_argument(
+        "--keep-duplicates",
+        action="store_true",
+        help="do not remove lines that overlap other lines in the same layer",
+    )
+    parser.add_argument(
+        "--common-lines",
+        action="store_true",
+        help="cut lines that are shared by layers only once, with the first "
+        "of those layers (off by default)",
+    )
+    parser.add_argument(
+        "--simplify",
+        action="store_true",
+        help="remove points that deviate less than 0.5 mm from a straight cut "
+        "(off by default)",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="dir",
+        help="directory to cache flattened DXF files in (off by default)",
+    )
     parser.add_argument(
         "--log",
         default="warning",
@@ -84,9 +241,76 @@ def process_arguments():
         "-s",
         "--sort",
         default="xy",
-        choices=["xy", "yx", "dist"],
+        choices=["xy", "yx", "dist", "opt"],
         help="sorting algorithm to use (defaults to 'xy')",
     )
+    parser.add_argument(
+        "--opttime",
+        metavar="s",
+        type=float,
+        default=1.0,
+        help="time limit per layer for improving the 'opt' order (defaults to 1 s)",
+    )
+    parser.add_argument(
+        "--ignore-nesting",
+        action="store_true",
+        help="do not cut segments that lie inside closed contours before "
+        "those contours",
+    )
+    parser.add_argument(
+        "--entry",
+        default="first",
+        choices=["first", "near", "corner"],
+        help="where to start closed contours; at their first point, at the point "
+        "nearest to the previous cut or at the nearest corner (defaults to 'first')",
+    )
+    parser.add_argument(
+        "-w",
+        "--window",
+        metavar="mm",
+        type=positive,
+        help="length of the cutting window for markers that are cut in bites; "
+        "the conveyor is moved this far between bites (off by default)",
+    )
+    parser.add_argument(
+        "--plunge",
+        metavar="F",
+        type=float,
+        help="maximum rotation angle in degrees where a lift and plunge corner "
+        "(M46) is used instead of lifting the knife (off by default)",
+    )
+    parser.add_argument(
+        "--drill",
+        metavar="mm",
+        type=float,
+        help="drill (M43) circles up to this radius at their center instead of "
+        "cutting them (off by default)",
+    )
+    parser.add_argument(
+        "--sharpen",
+        metavar="mm",
+        type=float,
+        help="sharpen the knife (M42) when it is up, before it has cut this "
+        "distance, and inhibit automatic sharpening (off by default)",
+    )
+    parser.add_argument(
+        "--slowradius",
+        metavar="mm",
+        type=float,
+        help="slow down (M25/M26) in curves with a smaller radius (off by default)",
+    )
+    parser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="print an estimate of the time needed to cut each program",
+    )
+    parser.add_argument(
+        "-m",
+        "--machine",
+        metavar="file",
+        help="file with machine parameters for the estimate "
+        "in the format of the controller's report",
+    )
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "-L", "--license", action=LicenseAction, nargs=0, help="print the license"
@@ -114,14 +338,21 @@ def main():
     """
     args = process_arguments()
     sorters = {"xy": utils.bbxykey, "yx": utils.bbyxkey, "dist": utils.distkey}
-    sortkey = sorters[args.sort]
-    lines.epsilon = args.dist
+    sortkey = sorters.get(args.sort)
+    lines.EPSILON = args.dist
+    params = machine.read(args.machine) if args.machine else None
+    bite = None
+    if args.window:
+        try:
+            bite = bitelength(args.window, params)
+        except ValueError as ex:
+            logging.error(str(ex))
+            sys.exit(1)
     for f in utils.xpand(args.files):
         logging.info('Starting file "{}"'.format(f))
         try:
             ofn = utils.outname(f, extension=".nc")
-            data = dx.parse(f)
-            entities = dx.entities(data)
+            bylayer = cache.segments(f, cachedir=args.cache)
         except ValueError as ex:
             logging.info(str(ex))
             fns = "error during processing. Skipping file '{}'."
@@ -131,28 +362,95 @@ def main():
             logging.info(str(ex))
             logging.error("i/o error in file '{}'. Skipping it.".format(f))
             continue
-        layers = dx.numberedlayers(entities)
-        entities = [e for e in entities if dx.bycode(e, 8) in layers]
-        num = len(entities)
+        num = sum(len(segments) for segments in bylayer.values())
         if num == 0:
-            logging.info("no entities found! Skipping file '{}'.".format(f))
+            logging.info("no segments found! Skipping file '{}'.".format(f))
             continue
-        logging.info("{} entities found.".format(num))
-        out = gerbernc.Writer(ofn)
-        for layername in layers:
-            out.newpiece()
-            thislayer = dx.fromlayer(entities, layername)
-            ls = '{} entities found in layer "{}".'
-            logging.info(ls.format(len(thislayer), layername))
-            segments = lines.mksegments(thislayer)
+        logging.info("{} segments found.".format(num))
+        pos = (0.0, 0.0)
+
+        def arrange(seg):
+            if args.simplify:
+                seg = simplified(seg, args.ang)
+            if sortkey:
+                seg = sorted(seg, key=sortkey)
+            else:
+                seg = optimized(seg, pos, args.opttime)
+            if not args.ignore_nesting:
+                seg = nested(seg)
+            if args.entry != "first":
+                seg = entered(seg, pos, args.ang if args.entry == "corner" else None)
+            return seg
+
+        prepared = {}
+        for layername, segments in bylayer.items():
             fs = '{} segments in layer "{}"'
             logging.info(fs.format(len(segments), layername))
-            if args.contours:
-                cut_contours(segments, out, layername, sortkey)
-            else:
-                segments.sort(key=sortkey)
-                cut_segments(segments, out)
-        out.write()
+            if not args.keep_duplicates:
+                segments = deduplicated(segments, layername)
+            prepared[layername] = segments
+        if args.common_lines:
+            prepared = shared(prepared)
+        if args.contours:
+            prepared = {nm: contours(seg, nm) for nm, seg in prepared.items()}
+        if bite:
+            parts, info = optimize.bites(prepared, bite)
+            logging.info("cutting in {} bites".format(len(parts)))
+        else:
+            parts, info = [prepared], None
+        # The output file is removed if cutting fails.
+        try:
+            with gerbernc.Writer(
+                ofn,
+                anglim=args.ang,
+                sharpen=args.sharpen,
+                slowradius=args.slowradius,
+                plunge=args.plunge,
+                bite=bite,
+            ) as out:
+                for n, bite in enumerate(parts):
+                    if n > 0:
+                        out.advance()
+                    count = cutlen = moved = 0
+                    for segments in bite.values():
+                        out.newpiece()
+                        if args.drill:
+                            segments, pos = drill_holes(segments, args.drill, out, pos)
+                        done = arrange(segments)
+                        cut_segments(done, out)
+                        if info:
+                            count += len(done)
+                            cutlen += sum(lines.length(s) for s in done)
+                            moved += optimize.travel(done, pos)
+                        if done:
+                            pos = done[-1][-1]
+                    if info:
+                        start, split = info[n]
+                        fs = "bite {} from x = {:.0f} mm: {} segments ({} split), "
+                        fs += "cutting {:.0f} mm, travel {:.0f} mm"
+                        logging.info(
+                            fs.format(n + 1, start, count, split, cutlen, moved)
+                        )
+        except ValueError as ex:
+            logging.info(str(ex))
+            fns = "error during processing. Skipping file '{}'."
+            logging.error(fns.format(f))
+            continue
+        tl, tp = machine.corners(out.lifts, out.plunges, params)
+        fs = "{} corners with knife lifts ({:.1f} s), {} lift and plunge corners "
+        fs += "({:.1f} s)"
+        logging.info(fs.format(out.lifts, tl, out.plunges, tp))
+        if args.drill:
+            logging.info("{} holes drilled".format(out.drills))
+        if args.sharpen:
+            logging.info("{} sharpens inserted".format(out.sharpens))
+        if args.slowradius and out.cutlen > 0:
+            fs = "{:.0f} mm of {:.0f} mm cut slowed ({:.1f}%)"
+            share = 100 * out.slowlen / out.cutlen
+            logging.info(fs.format(out.slowlen, out.cutlen, share))
+        if args.estimate:
+            times = machine.total(machine.estimate(gerbernc.read(ofn), params))
+            print("File '{}': {}".format(ofn, machine.describe(times)))
 
 
 if __name__ == "__main__":
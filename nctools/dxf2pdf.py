@@ -10,8 +10,7 @@
 import argparse
 import logging
 import sys
-from nctools import dxfreader as dxf
-from nctools import lines, utils, plot
+from nctools import cache, lines, utils, plot
 from nctools import __VERSION__, __LICENSE__
 
 _CP = f"""dxf2pdf {__VERSION__}
@@ -38,6 +37,11 @@ def process_arguments():
     parser.add_argument(
         "-c", "--contours", help=argtxt4, dest="contours", action="store_true"
     )
+    parser.add_argument(
+        "--cache",
+        metavar="dir",
+        help="directory to cache flattened DXF files in (off by default)",
+    )
     parser.add_argument(
         "--log",
         default="warning",
@@ -79,7 +83,7 @@ def process_arguments():
     return args
 
 
-def output(ifn, ofn, entities, args):
+def output(ifn, ofn, bylayer, args):
     opts = []
     if args.contours:
         opts = ["contours"]
@@ -88,26 +92,17 @@ def output(ifn, ofn, entities, args):
     sorters = {"xy": utils.bbxykey, "yx": utils.bbyxkey, "dist": utils.distkey}
     sortkey = sorters[args.sort]
     if not args.alllayers:
-        layers = dxf.numberedlayers(entities)
-        logging.info(f"{len(layers)} numbered layers found")
-        entities = [e for e in entities if dxf.bycode(e, 8) in layers]
-    else:
-        layers = dxf.layernames(entities)
-    num = len(entities)
+        logging.info(f"{len(bylayer)} numbered layers found")
+    num = sum(len(segments) for segments in bylayer.values())
     if num == 0:
-        logging.info("no entities found! Skipping file '{}'.".format(ifn))
+        logging.info("no segments found! Skipping file '{}'.".format(ifn))
         return
-    logging.info("{} entities found".format(num))
-    allsegments = lines.mksegments(entities)
-    bboxes = [lines.bbox(s) for s in allsegments]
+    logging.info("{} segments found".format(num))
+    bboxes = [segments.bbox() for segments in bylayer.values() if segments]
     minx, miny, maxx, maxy = lines.merge_bbox(bboxes)
     out, ctx = plot.setup(ofn, minx, miny, maxx, maxy)
     plot.grid(ctx, minx, miny, maxx, maxy)
-    for layername in layers:
-        thislayer = dxf.fromlayer(entities, layername)
-        segments = lines.mksegments(thislayer)
-        ls = '{} entities found in layer "{}".'
-        logging.info(ls.format(len(thislayer), layername))
+    for layername, segments in bylayer.items():
         logging.info("plotting the entities")
         if args.contours:
             closedseg, openseg = lines.combine_segments(segments)
@@ -138,8 +133,7 @@ def main():
         logging.info('starting file "{}"'.format(f))
         try:
             ofn = utils.outname(f, extension=".pdf", addenum="_dxf")
-            data = dxf.parse(f)
-            entities = dxf.entities(data)
+            bylayer = cache.segments(f, args.alllayers, args.cache)
         except ValueError as ex:
             logging.info(str(ex))
             fns = "cannot construct output filename. Skipping file '{}'."
@@ -149,7 +143,7 @@ def main():
             logging.info(str(ex))
             logging.error("cannot open the file '{}'. Skipping it.".format(f))
             continue
-        output(f, ofn, entities, args)
+        output(f, ofn, bylayer, args)
 
 
 if __name__ == "__main__":
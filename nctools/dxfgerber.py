@@ -16,8 +16,7 @@ sorted order.
 import argparse
 import logging
 import sys
-from nctools import dxfreader as dx
-from nctools import lines, utils
+from nctools import cache, lines, optimize, utils
 from nctools import __VERSION__, __LICENSE__
 
 _CP = f"""dxfgerber {__VERSION__}
@@ -74,18 +73,51 @@ def write_segment(s, out, layer):
         out.write(plfooter.format(layer=layer))
 
 
-def write_allseg(seg, out, layer, keyfunc):
-    """Assemble segments into contours before writing them."""
+def write_allseg(
+    seg, out, layer, keyfunc, start=None, corner=None, simplify=False, nest=True
+):
+    """
+    Assemble segments into contours before writing them.
+
+    Arguments:
+        seg: List of line segments.
+        out: File to write to.
+        layer: Name of the layer.
+        keyfunc: Sorting key.
+        start: If not None, start closed contours at the vertex nearest to
+            the end of the previous contour. The first contour is measured
+            from this position.
+        corner: Minimum angle in degrees of preferred start points, or None.
+        simplify: Remove points that deviate little from a straight line.
+        nest: Write segments that lie inside closed contours before them.
+
+    Returns:
+        The written segments.
+    """
     closedseg, openseg = lines.combine_segments(seg)
     fs = '{} {} segments in layer "{}"'
     for a, b in (("closed", closedseg), ("open", openseg)):
         logging.info(fs.format(len(b), a, layer))
+    if simplify:
+        before = sum(len(s) for s in closedseg + openseg)
+        closedseg = [lines.simplify(s) for s in closedseg]
+        openseg = [lines.simplify(s) for s in openseg]
+        after = sum(len(s) for s in closedseg + openseg)
+        logging.info("simplifying reduced {} points to {}".format(before, after))
     openseg.sort(key=keyfunc)
-    for s in openseg:
-        write_segment(s, out, layer)
     closedseg.sort(key=keyfunc)
-    for s in closedseg:
+    allseg = openseg + closedseg
+    if nest:
+        allseg, count = optimize.innerfirst(allseg)
+        logging.info("{} segments lie inside closed contours".format(count))
+    if start is not None:
+        before = optimize.travel(allseg, start)
+        allseg = optimize.startpoints(allseg, start, corner)
+        after = optimize.travel(allseg, start)
+        logging.info("start points save {:.0f} mm of travel".format(before - after))
+    for s in allseg:
         write_segment(s, out, layer)
+    return allseg
 
 
 def process_arguments():
@@ -99,6 +131,17 @@ def process_arguments():
         type=float,
         default=0.25,
     )
+    parser.add_argument(
+        "--simplify",
+        action="store_true",
+        help="remove points that deviate less than 0.5 mm from a straight line "
+        "(off by default)",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="dir",
+        help="directory to cache flattened DXF files in (off by default)",
+    )
     parser.add_argument(
         "--log",
         default="warning",
@@ -112,6 +155,20 @@ def process_arguments():
         choices=["xy", "yx", "dist"],
         help="sorting algorithm to use (defaults to 'xy')",
     )
+    parser.add_argument(
+        "--ignore-nesting",
+        action="store_true",
+        help="do not write segments that lie inside closed contours before "
+        "those contours",
+    )
+    parser.add_argument(
+        "--entry",
+        default="first",
+        choices=["first", "near", "corner"],
+        help="where to start closed contours; at their first point, at the point "
+        "nearest to the previous contour or at the nearest corner "
+        "(defaults to 'first')",
+    )
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
         "-L", "--license", action=LicenseAction, nargs=0, help="print the license"
@@ -140,13 +197,14 @@ def main():
     args = process_arguments()
     sorters = {"xy": utils.bbxykey, "yx": utils.bbyxkey, "dist": utils.distkey}
     sortkey = sorters[args.sort]
-    lines.epsilon = args.dist
+    # Corners are where dxf2nc lifts the knife by default.
+    corner = 60.0 if args.entry == "corner" else None
+    lines.EPSILON = args.dist
     for f in utils.xpand(args.files):
         logging.info('starting file "{}"'.format(f))
         try:
             ofn = utils.outname(f, extension=".dxf", addenum="_mod")
-            data = dx.parse(f)
-            entities = dx.entities(data)
+            bylayer = cache.segments(f, cachedir=args.cache)
         except ValueError as ex:
             logging.info(str(ex))
             fns = "error during processing. Skipping file '{}'."
@@ -156,23 +214,29 @@ def main():
             logging.info(str(ex))
             logging.error("i/o error in file '{}'. Skipping it.".format(f))
             continue
-        layers = dx.numberedlayers(entities)
-        entities = [e for e in entities if dx.bycode(e, 8) in layers]
-        num = len(entities)
+        num = sum(len(segments) for segments in bylayer.values())
         if num == 0:
-            logging.info("no entities found! Skipping file '{}'.".format(f))
+            logging.info("no segments found! Skipping file '{}'.".format(f))
             continue
-        logging.info("{} entities found.".format(num))
+        logging.info("{} segments found.".format(num))
         with open(ofn, "w") as out:
             out.write(dxfheader)
-            for layername in layers:
-                thislayer = dx.fromlayer(entities, layername)
-                ls = '{} entities found in layer "{}".'
-                logging.info(ls.format(num, layername))
-                segments = lines.mksegments(thislayer)
+            pos = None if args.entry == "first" else (0.0, 0.0)
+            for layername, segments in bylayer.items():
                 fs = '{} segments in layer "{}"'
                 logging.info(fs.format(len(segments), layername))
-                write_allseg(segments, out, layername, sortkey)
+                done = write_allseg(
+                    segments,
+                    out,
+                    layername,
+                    sortkey,
+                    pos,
+                    corner,
+                    args.simplify,
+                    not args.ignore_nesting,
+                )
+                if pos is not None and done:
+                    pos = done[-1][-1]
             out.write(dxffooter)
 
 
@@ -26,24 +26,197 @@
 # EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """Module for retrieving the drawing entities from DXF files."""
 
+import functools
+import mmap
 import re
 
+# Matches the group 2 "ENTITIES" pair that starts the ENTITIES section.
+_ENTITIES = re.compile(rb"^[ \t]*2[ \t]*\r?\n[ \t]*ENTITIES[ \t]*\r?\n", re.M)
 
-def parse(filename):
+
+class Entity:
+    """
+    A DXF drawing entity.
+
+    It behaves like a tuple of (group, data) tuples, but the group codes are
+    indexed once on creation. So looking up data by group code doesn't
+    require a scan of the whole entity.
+    """
+
+    __slots__ = ("pairs", "index")
+
+    def __init__(self, pairs):
+        """
+        Create the entity and index its group codes.
+
+        Arguments:
+            pairs: Iterable of (group, data) tuples.
+        """
+        self.pairs = tuple(pairs)
+        index = {}
+        for g, d in self.pairs:
+            if g not in index:
+                index[g] = d
+            elif isinstance(index[g], list):
+                index[g].append(d)
+            else:
+                index[g] = [index[g], d]
+        self.index = index
+
+    @property
+    def kind(self):
+        """The entity type, e.g. "LINE"."""
+        return self.get(0)
+
+    @property
+    def layer(self):
+        """The name of the layer of the entity."""
+        return self.get(8)
+
+    def get(self, group, default=None):
+        """Return the first data for a group code, or default."""
+        d = self.index.get(group, default)
+        if isinstance(d, list):
+            return d[0]
+        return d
+
+    def getall(self, group):
+        """Return a list of all data for a group code, in order."""
+        d = self.index.get(group)
+        if d is None:
+            return []
+        if isinstance(d, list):
+            return list(d)
+        return [d]
+
+    def bycode(self, group):
+        """See the bycode function."""
+        d = self.index.get(group)
+        if d is None:
+            return []
+        if isinstance(d, list):
+            return list(d)
+        return d
+
+    def __iter__(self):
+        return iter(self.pairs)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __getitem__(self, n):
+        return self.pairs[n]
+
+    def __eq__(self, other):
+        if isinstance(other, Entity):
+            return self.pairs == other.pairs
+        if isinstance(other, tuple):
+            return self.pairs == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pairs)
+
+    def __repr__(self):
+        return "Entity({!r})".format(self.pairs)
+
+
+def tokenize(dxffile):
+    """
+    Break an open DXF file into (group, data) tuples.
+
+    The file is read lazily, two lines at a time.
+
+    Arguments:
+        dxffile: An open DXF file, or any iterable of lines.
+
+    Yields:
+        (group, data) tuples. The group is an int, the data a string.
+    """
+    lines = iter(dxffile)
+    for group, data in zip(lines, lines):
+        yield int(group), data.strip()
+
+
+def scan(mm):
+    """
+    Break a memory-mapped DXF file into (group, data) tuples.
+
+    Scanning starts at the current position of the map. Only the data of
+    groups 0-9 (entity types, names, layers) is decoded. The data of all
+    other groups is returned as stripped bytes; float() and int() accept
+    those directly.
+
+    Arguments:
+        mm: An mmap.mmap of a DXF file.
+
+    Yields:
+        (group, data) tuples. The group is an int, the data a string or bytes.
+    """
+    lines = iter(mm.readline, b"")
+    for group, data in zip(lines, lines):
+        group = int(group)
+        if group < 10:
+            yield group, data.strip().decode("cp1252")
+        else:
+            yield group, data.strip()
+
+
+def parse(filename, backend="text"):
     """
     Read a DXF file and break it into (group, data) tuples.
 
     Arguments:
         filename: Name of a DXF file to read.
+        backend: "text" to use tokenize(), "mmap" to use scan().
 
     Returns:
         A list of (group, data) tuples.
     """
+    if backend == "mmap":
+        with open(filename, "rb") as dxffile:
+            with mmap.mmap(dxffile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return list(scan(mm))
     with open(filename, encoding="cp1252") as dxffile:
-        lines = dxffile.readlines()
-    lines = [ln.strip() for ln in lines]
-    data = list(zip(lines[::2], lines[1::2]))
-    return [(int(g), d) for g, d in data]
+        return list(tokenize(dxffile))
+
+
+def _collect(data):
+    """Assemble entities from (group, data) tuples up to the end of a section."""
+    current = None
+    for g, d in data:
+        if d == "ENDSEC":
+            break
+        if g == 0:
+            if current:
+                yield Entity(current)
+            current = []
+        if current is not None:
+            current.append((g, d))
+    if current:
+        yield Entity(current)
+
+
+def iterentities(data):
+    """
+    Isolate the entity data from an iterable of (group, data) tuples.
+
+    Only the entity that is being assembled is kept in memory, so this can
+    be used on the output of tokenize() to stream entities from a file.
+
+    Arguments:
+        data: Input iterable of DXF (group, data) tuples.
+
+    Yields:
+        Drawing entities, each as an Entity.
+    """
+    data = iter(data)
+    for _, d in data:
+        if d == "ENTITIES":
+            break
+    else:
+        raise ValueError("no ENTITIES section found")
+    yield from _collect(data)
 
 
 def entities(data):
@@ -54,20 +227,44 @@ def entities(data):
         data: Input list of DXF (group, data) tuples.
 
     Returns:
-        A list of drawing entities, each as a dictionary
-        keyed by group code.
+        A list of drawing entities, each as an Entity.
+    """
+    return list(iterentities(data))
+
+
+def readentities(filename, backend="text"):
     """
-    soe = [n for n, d in enumerate(data) if d[1] == "ENTITIES"][0]
-    eoe = [n for n, d in enumerate(data) if d[1] == "ENDSEC" and n > soe][0]
-    entdata = data[soe + 1 : eoe]
-    idx = [n for n, d in enumerate(entdata) if d[0] == 0] + [len(entdata)]
-    pairs = list(zip(idx, idx[1:]))
-    entities = [tuple(entdata[b:e]) for b, e in pairs]
-    return entities
+    Read the drawing entities from a DXF file.
+
+    The "text" backend streams the file through tokenize() and
+    iterentities(); the list of (group, data) tuples for the whole file is
+    never built. The "mmap" backend memory-maps the file, jumps straight to
+    the ENTITIES section and only scans that. See scan() for the type of
+    the data it returns.
+
+    Arguments:
+        filename: Name of a DXF file to read.
+        backend: "text" or "mmap".
+
+    Returns:
+        A list of drawing entities, each as an Entity.
+    """
+    if backend == "mmap":
+        with open(filename, "rb") as dxffile:
+            with mmap.mmap(dxffile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                m = _ENTITIES.search(mm)
+                if m is None:
+                    raise ValueError("no ENTITIES section found")
+                mm.seek(m.end())
+                return list(_collect(scan(mm)))
+    with open(filename, encoding="cp1252") as dxffile:
+        return list(iterentities(tokenize(dxffile)))
 
 
 def layername(ent):
     """Get the layer name of an entity."""
+    if isinstance(ent, Entity):
+        return ent.getall(8)[0]
     return [v for k, v in ent if k == 8][0]
 
 
@@ -83,6 +280,8 @@ def bycode(ent, group):
         The data for the given group code. Can be a list of items if the group
         code occurs multiple times.
     """
+    if isinstance(ent, Entity):
+        return ent.bycode(group)
     data = [v for k, v in ent if k == group]
     if len(data) == 1:
         return data[0]
@@ -104,6 +303,42 @@ def layernames(entities):
     return lnames
 
 
+@functools.lru_cache(maxsize=None)
+def layernumber(name):
+    """
+    Get the number from a layer name.
+
+    The results are cached, so this is cheap to call repeatedly.
+
+    Arguments:
+        name: A layer name.
+
+    Returns:
+        The number in the layer name as an int, or None if the name doesn't
+        contain exactly one positive number.
+    """
+    numbers = re.findall(r"[1-9]\d*", name)
+    if len(numbers) != 1:
+        return None
+    return int(numbers[0])
+
+
+def numbered(names):
+    """
+    Select the layer names that contain a number, except for layer 0.
+
+    Arguments:
+        names: An iterable of layer names.
+
+    Returns:
+        A list of layer names with a number in them, sorted by ascending
+        number.
+    """
+    rv = sorted(ln for ln in names if layernumber(ln) is not None)
+    rv.sort(key=layernumber)
+    return rv
+
+
 def numberedlayers(entities):
     """
     Get layer names from entities that contain a number, except for layer 0.
@@ -115,16 +350,36 @@ def numberedlayers(entities):
         A list of layer names with a number in them, sorted by ascending
         number.
     """
-    layers = layernames(entities)
-    numbered = [ln for ln in layers if len(re.findall(r"[1-9]\d*", ln)) == 1]
-    numbered.sort(key=lambda ln: int(re.search(r"[1-9]\d*", ln).group()))
-    return numbered
+    return numbered(layernames(entities))
+
+
+def layerindex(entities):
+    """
+    Partition entities by layer in a single pass.
+
+    Arguments:
+        entities: An iterable of DXF entities.
+
+    Returns:
+        A dictionary mapping layer names to lists of entities. The entities
+        keep their original order.
+    """
+    index = {}
+    for e in entities:
+        name = layername(e)
+        if name in index:
+            index[name].append(e)
+        else:
+            index[name] = [e]
+    return index
 
 
 def fromlayer(entities, name):
     """
     Return only the entities from the named layer.
 
+    If entities from more than one layer are needed, layerindex is faster.
+
     Arguments:
         entities: An iterable of dictionaries, each containing a DXF entity.
         name: The name of the layer to filter on.
@@ -30,13 +30,43 @@ The language and file format for PCB machines is different!
 """
 
 import math
+import os
 import os.path as op
+import re
+from array import array
+from collections import namedtuple
+from nctools import lines
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Minimum number of points for which numpy is used.
+NPMIN = 128
 
 
 class Writer(object):
-    """Write Gerber NC files."""
+    """
+    Write Gerber NC files.
+
+    Commands are written to a temporary file as they are issued. The last
+    command is held back, so that a trailing N command can be dropped when
+    the file is finished. The length and width of the program in the header
+    are written as a fixed-width field, that is filled in when the file is
+    finished. Only then is the temporary file renamed to the output file.
+    """
 
-    def __init__(self, path, name=None, anglim=60):
+    def __init__(
+        self,
+        path,
+        name=None,
+        anglim=60,
+        sharpen=None,
+        slowradius=None,
+        plunge=None,
+        bite=None,
+    ):
         """
         Initialize the writer.
 
@@ -45,6 +75,17 @@ class Writer(object):
             name: name of the program. If not given, the basename without
                   any extension will be used.
             anglim: limit of angle between continuou cuts.
+            sharpen: if given, the knife is sharpened (M42) when it is up
+                  before it has cut this many mm, and automatic sharpening
+                  is inhibited (M41).
+            slowradius: if given, cuts in curves with a smaller radius in mm
+                  are slowed down (M25/M26).
+            plunge: if given, corners that turn more than anglim but not
+                  more than this many degrees are cut with a lift and
+                  plunge (M46) instead of raising and lowering the knife.
+            bite: if given, the length in mm that the conveyor moves for
+                  every advance(). It is written as the bite length (Z)
+                  after the H block, and rounded to 1/100 in.
         """
         self.path = path
         self.name = name
@@ -52,29 +93,100 @@ class Writer(object):
             self.name = op.splitext(op.basename(path))[0]
         self.cut = False
         self.pos = None
+        self.exact = None
         self.ang = None
         self.bbox = None
-        self.f = None
         self.anglim = float(anglim)
         self.piece = 0
-        # commands[2] is an empty placeholder. The name, length and width of
-        # the program need to be put there before writing.
-        self.commands = ["H1", "M20", "", "M15"]
+        self.bite = bite
+        self.bites = 1
+        # Statistics; lengths are in mm.
+        self.cutlen = 0.0
+        self.slowlen = 0.0
+        self.sharpens = 0
+        self.sharpen = sharpen
+        self.since = 0.0
+        self.slowradius = slowradius
+        self.plunge = plunge
+        self.lifts = 0
+        self.plunges = 0
+        self.drills = 0
+        self.tmp = path + ".tmp"
+        self.f = open(self.tmp, "wb")
+        self.f.write(b"H1*")
+        if bite:
+            self.f.write("X0Z{}*".format(round(bite * 100 / 25.4)).encode("utf-8"))
+        self.f.write(b"M20*")
+        # The header is patched with the real size in write().
+        self.hpos = self.f.tell()
+        self.header = self._header(0.0, 0.0)
+        self.f.write(self.header + b"*")
+        self.prev = "M20"
+        self.last = "M15"
+        if sharpen:
+            self._emit(["M41"])
 
-    def __str__(self):
-        """Convert to string."""
-        return "*".join(self.commands)
+    def _header(self, length, width):
+        """Return the encoded header with the name and size of the program."""
+        return "{}/L={:08.3f}/W={:08.3f}".format(self.name, length, width).encode(
+            "utf-8"
+        )
+
+    def _emit(self, commands):
+        """
+        Write commands to the file.
+
+        The last command is held back.
+
+        Arguments:
+            commands: Non-empty list of commands.
+        """
+        commands.insert(0, self.last)
+        self.f.write(("*".join(commands[:-1]) + "*").encode("utf-8"))
+        self.prev, self.last = commands[-2:]
 
     def newpiece(self):
         """Start a new piece."""
         self.piece += 1
-        self.commands += ["N{}".format(self.piece)]
+        self._emit(["N{}".format(self.piece)])
 
     def up(self):
         """Stop cutting (raise the knife)."""
         self.cut = False
         self.ang = None
-        self.commands += ["M15"]
+        self._emit(["M15"])
+
+    def advance(self):
+        """
+        Move the conveyor one bite length (M69).
+
+        The bite length is in the header, so the controller knows how far the
+        marker has moved. The coordinates after this are still measured from
+        the start of the marker.
+        """
+        if not self.bite:
+            raise ValueError("bite length not given")
+        if self.cut:
+            self.up()
+        self.bites += 1
+        self._emit(["M69"])
+
+    def drill(self, x, y):
+        """
+        Drill a hole (M43).
+
+        Arguments:
+            x: x coordinate in mm
+            y: y coordinate in mm
+        """
+        if self.cut:
+            self.up()
+        exact = (x * 100.0 / 25.4, y * 100.0 / 25.4)
+        pnt = (round(exact[0]), round(exact[1]))
+        self._move(pnt, exact)
+        self._bbupdate(pnt)
+        self.drills += 1
+        self._emit(["M43"])
 
     def _bbupdate(self, pnt):
         """Update bounding box."""
@@ -87,7 +199,7 @@ class Writer(object):
             elif pnt[0] > c:
                 c = pnt[0]
             if pnt[1] < b:
-                a = pnt[1]
+                b = pnt[1]
             elif pnt[1] > d:
                 d = pnt[1]
             self.bbox = (a, b, c, d)
@@ -98,7 +210,20 @@ class Writer(object):
             raise ValueError("start cutting at unknown position")
         self.cut = True
         self._bbupdate(self.pos)
-        self.commands += ["M14"]
+        self._emit(self._sharpened(["M14"]))
+
+    def _sharpened(self, commands):
+        """
+        Sharpen the knife before commands that lower it, if it is due.
+
+        Without knowing how long the next cut is, this happens at the first
+        knife-up point after the sharpening distance.
+        """
+        if self.sharpen and self.since >= self.sharpen:
+            self.since = 0.0
+            self.sharpens += 1
+            return ["M42"] + commands
+        return commands
 
     def moveto(self, x, y):
         """
@@ -111,47 +236,312 @@ class Writer(object):
             x: x coordinate in mm
             y: y coordinate in mm
         """
-        x, y = mm2cin([x, y])
+        exact = (x * 100.0 / 25.4, y * 100.0 / 25.4)
+        self._move((round(exact[0]), round(exact[1])), exact)
+
+    def cut_polyline(self, points):
+        """
+        Cut along a list of points.
+
+        The knife is moved to the first point with the knife up, and raised
+        again after the last point. Points that are equal after conversion to
+        1/100 in are cut only once.
+
+        Arguments:
+            points: Sequence of (x, y) coordinates in mm.
+        """
+        pnts, exact = _convert(points)
+        if len(pnts) < 2:
+            return
+        if self.cut:
+            self.up()
+        commands = []
+        if pnts[0] != self.pos:
+            commands.append("X{}Y{}".format(*pnts[0]))
+            self.exact = exact[0]
+        commands.append("M14")
+        xs, ys = zip(*pnts)
+        self._bbupdate((min(xs), min(ys)))
+        self._bbupdate((max(xs), max(ys)))
+        exact[0] = self.exact
+        cuts = [f"X{x}Y{y}" for x, y in pnts[1:]]
+        lifts = _lifts(exact, self.anglim)
+        plunges = []
+        if self.plunge and lifts:
+            sharp = set(_lifts(exact, self.plunge))
+            plunges = [n for n in lifts if n not in sharp]
+            lifts = [n for n in lifts if n in sharp]
+        self.lifts += len(lifts)
+        self.plunges += len(plunges)
+        steps = list(map(math.dist, pnts, pnts[1:]))
+        self.cutlen += sum(steps) * 0.254
+        if self.sharpen or self.slowradius or plunges:
+            cuts.append("M15")
+            self._schedule(commands, cuts, steps, exact, lifts, plunges)
+            commands += cuts
+        else:
+            for n in reversed(lifts):
+                cuts[n:n] = ["M15", "M14"]
+            commands += cuts
+            commands.append("M15")
+        self._emit(commands)
+        self.pos, self.exact = pnts[-1], tuple(exact[-1])
+
+    def _schedule(self, commands, cuts, steps, exact, lifts, plunges):
+        """
+        Add corner, sharpening and slowdown codes to a cut.
+
+        Arguments:
+            commands: Commands before the cut, ending with M14. Modified.
+            cuts: Moves of the cut, followed by M15. Modified.
+            steps: Length of each move in 1/100 in.
+            exact: Positions of the cut in 1/100 in.
+            lifts: Indices of the moves before which the knife is lifted.
+            plunges: Indices of the moves before which M46 is used.
+        """
+        insert = {n: ["M15", "M14"] for n in lifts}
+        insert.update((n, ["M46"]) for n in plunges)
+        steps = [d * 0.254 for d in steps]
+        if self.sharpen:
+            bounds = [0] + lifts + [len(steps)]
+            for a, b in zip(bounds, bounds[1:]):
+                run = math.fsum(steps[a:b])
+                # Sharpen at the knife-up point before the run that would
+                # pass the sharpening distance.
+                if self.since > 0 and self.since + run > self.sharpen:
+                    if a == 0:
+                        commands.insert(-1, "M42")
+                    else:
+                        insert[a] = ["M15", "M42", "M14"]
+                    self.since = 0.0
+                    self.sharpens += 1
+                self.since += run
+        if self.slowradius:
+            tight = _tight(exact, lifts + plunges, self.slowradius / 0.254)
+            slow = False
+            for n, t in enumerate(tight + [False]):
+                if t != slow:
+                    insert.setdefault(n, []).append("M25" if t else "M26")
+                    slow = t
+            self.slowlen += math.fsum(d for d, t in zip(steps, tight) if t)
+        for n in sorted(insert, reverse=True):
+            cuts[n:n] = insert[n]
+
+    def _move(self, pnt, exact):
+        """
+        Move the cutting head to an integer position.
+
+        Arguments:
+            pnt: (x, y) coordinates in 1/100 in
+            exact: (x, y) coordinates in 1/100 in before rounding, used to
+                calculate the direction of the cut.
+        """
+        if pnt == self.pos:
+            return
+        commands = []
         if self.cut:  # We're cutting
-            self._bbupdate((x, y))
-            dx, dy = x - self.pos[0], y - self.pos[1]
-            newang = math.degrees(math.atan2(dy, dx))
-            if newang < 0.0:
-                newang += 360.0
-            if self.ang is not None:
-                angdif = math.fabs(newang - self.ang)
-                if angdif > 180:
-                    angdif = 360 - angdif
-                if angdif > self.anglim:
-                    self.commands += ["M15", "M14"]
+            self._bbupdate(pnt)
+            newang = _heading(self.exact, exact)
+            turn = 0.0 if self.ang is None else _angdif(newang, self.ang)
+            if turn > self.anglim and self.plunge and turn <= self.plunge:
+                commands.append("M46")
+                self.plunges += 1
+            elif turn > self.anglim:
+                commands += ["M15"] + self._sharpened(["M14"])
+                self.lifts += 1
             self.ang = newang
-        self.commands += ["X{:.0f}Y{:.0f}".format(x, y)]
-        self.pos = (x, y)
+            d = math.dist(pnt, self.pos) * 0.254
+            self.cutlen += d
+            self.since += d
+        commands.append("X{}Y{}".format(*pnt))
+        self._emit(commands)
+        self.pos = pnt
+        self.exact = exact
 
     def write(self):
-        """Write the NC file."""
-        self.__enter__()
-        self.__exit__(None, None, None)
+        """Finish and close the NC file."""
+        if self.f.closed:
+            return
+        if self.last.startswith("N"):
+            # Remove unnecessary newpiece()
+            commands = [] if self.prev == "M15" else ["M15"]
+        elif self.last == "M15":
+            commands = [self.last]
+        else:
+            commands = [self.last, "M15"]
+        if self.sharpen:
+            commands.append("M40")
+        commands.append("M0")
+        self.f.write(("*".join(commands) + "*").encode("utf-8"))
+        li = wi = 0.0
+        if self.bbox:
+            a, b, c, d = self.bbox
+            li = abs(a - c) / 100.0
+            wi = abs(b - d) / 100.0
+        header = self._header(li, wi)
+        if len(header) != len(self.header):
+            self.discard()
+            raise ValueError("program too large for the header")
+        self.f.seek(self.hpos)
+        self.f.write(header)
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        """Close and remove the unfinished NC file."""
+        if self.f.closed:
+            return
+        self.f.close()
+        os.remove(self.tmp)
 
     def __enter__(self):
         """Start context manager."""
-        self.f = open(self.path, "wb")
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Stop context manager."""
-        a, b, c, d = self.bbox
-        li = abs(a - c) / 100.0
-        wi = abs(b - d) / 100.0
-        self.commands[2] = "{}/L={:.3f}/W={:.3f}".format(self.name, li, wi)
-        if self.commands[-1].startswith("N"):
-            del self.commands[-1]  # Remove unnecessary newpiece()
-        if not self.commands[-1] == "M15":
-            self.commands.append("M15")
-        self.commands.append("M0")
-        self.f.write("*".join(self.commands).encode("utf-8"))
-        self.f.write(b"*")
-        self.f.close()
+        if exc_type:
+            self.discard()
+        else:
+            self.write()
+
+
+def _heading(p, q):
+    """Return the direction from p to q in degrees, from 0 up to 360."""
+    ang = math.degrees(math.atan2(q[1] - p[1], q[0] - p[0]))
+    if ang < 0.0:
+        ang += 360.0
+    return ang
+
+
+def _angdif(a, b):
+    """Return the difference between two directions in degrees."""
+    angdif = math.fabs(a - b)
+    if angdif > 180:
+        angdif = 360 - angdif
+    return angdif
+
+
+def _lifts(exact, anglim):
+    """
+    Find the moves in a cut before which the knife has to be lifted.
+
+    Arguments:
+        exact: List of at least two (x, y) positions in 1/100 in. The first
+            is where the cut starts.
+        anglim: Maximum change of direction between continuous cuts.
+
+    Returns:
+        A list of the indices of the moves that need a lift.
+    """
+    if np is not None and len(exact) >= NPMIN:
+        d = np.diff(np.asarray(exact), axis=0)
+        h = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+        h[h < 0.0] += 360.0
+        angdif = np.abs(h[1:] - h[:-1])
+        angdif = np.where(angdif > 180, 360 - angdif, angdif)
+        lifts = set((np.flatnonzero(angdif > anglim) + 1).tolist())
+        # The result of numpy.arctan2 can differ in the last bit from that of
+        # math.atan2. Changes of direction close to the limit are calculated
+        # again in the same way as in Writer.moveto.
+        for n in (np.flatnonzero(np.abs(angdif - anglim) < 1e-6) + 1).tolist():
+            a = _heading(exact[n - 1], exact[n])
+            b = _heading(exact[n], exact[n + 1])
+            if _angdif(b, a) > anglim:
+                lifts.add(n)
+            else:
+                lifts.discard(n)
+        return sorted(lifts)
+    degrees, atan2 = math.degrees, math.atan2
+    h = [degrees(atan2(d - b, c - a)) for (a, b), (c, d) in zip(exact, exact[1:])]
+    h = [a + 360.0 if a < 0.0 else a for a in h]
+    lifts = []
+    for n, (a, b) in enumerate(zip(h, h[1:]), 1):
+        angdif = abs(b - a)
+        if angdif > 180:
+            angdif = 360 - angdif
+        if angdif > anglim:
+            lifts.append(n)
+    return lifts
+
+
+def _tight(exact, lifts, radius):
+    """
+    Find the moves in a cut that are part of a tight curve.
+
+    The radius of the curve at a point is that of the circle through the
+    point and its neighbours. Points where the knife is lifted are corners,
+    not curves.
+
+    Arguments:
+        exact: List of at least two (x, y) positions in 1/100 in.
+        lifts: Indices of the moves before which the knife is lifted.
+        radius: Smallest radius in 1/100 in that is cut at full speed.
+
+    Returns:
+        A list of booleans, one for every move.
+    """
+    if np is not None and isinstance(exact, np.ndarray):
+        exact = exact.tolist()
+    tight = [False] * len(exact)
+    for n, (a, b, c) in enumerate(zip(exact, exact[1:], exact[2:]), 1):
+        ux, uy = b[0] - a[0], b[1] - a[1]
+        vx, vy = c[0] - b[0], c[1] - b[1]
+        cross = abs(ux * vy - uy * vx)
+        # R = |ab|·|bc|·|ac| / (2·|ab × bc|)
+        prod = math.hypot(ux, uy) * math.hypot(vx, vy) * math.dist(a, c)
+        tight[n] = cross > 0 and prod < 2 * radius * cross
+    for n in lifts:
+        tight[n] = False
+    return [p or q for p, q in zip(tight, tight[1:])]
+
+
+def _convert(points):
+    """
+    Convert points from millimeters to 1/100 in.
+
+    Consecutive points that are equal after rounding are reduced to one.
+
+    Arguments:
+        points: Sequence of (x, y) coordinates in mm.
+
+    Returns:
+        A list of the rounded (x, y) coordinates as integers, and a sequence
+        of the (x, y) coordinates before rounding. For long sequences of
+        points the latter is a numpy array.
+    """
+    if np is not None and len(points) >= NPMIN:
+        exact = np.array(points, dtype=float) * 100.0 / 25.4
+        pnts = np.rint(exact).astype(int)
+        keep = np.ones(len(pnts), dtype=bool)
+        keep[1:] = np.any(pnts[1:] != pnts[:-1], axis=1)
+        return list(map(tuple, pnts[keep].tolist())), exact[keep]
+    pnts, exact = [], []
+    last = None
+    for x, y in points:
+        x, y = x * 100.0 / 25.4, y * 100.0 / 25.4
+        p = (round(x), round(y))
+        if p != last:
+            pnts.append(p)
+            exact.append((x, y))
+            last = p
+    return pnts, exact
+
+
+def quantize(points):
+    """
+    Convert points from millimeters to integer 1/100 in.
+
+    Consecutive points that are equal after the conversion are reduced to
+    one.
+
+    Arguments:
+        points: Sequence of (x, y) coordinates in mm.
+
+    Returns:
+        A list of (x, y) tuples of integers.
+    """
+    return _convert(points)[0]
 
 
 def mm2cin(arg):
@@ -184,6 +574,103 @@ def cin2mm(arg):
     return [float(j) * 0.254 for j in arg]
 
 
+# A command from an NC file. The kind is one of "move", "down", "up", "piece",
+# "bite", "stop", "code" or "text". The arguments are (x, y) in 1/100 in for
+# a move, (x, length) in 1/100 in for a bite, (number,) for a piece and
+# (letters, argument) for other codes.
+Command = namedtuple("Command", ["kind", "text", "args"])
+
+_SIMPLE = {
+    "M14": "down",
+    "B": "down",
+    "M15": "up",
+    "A": "up",
+    "M0": "stop",
+    "M00": "stop",
+}
+_CODE = re.compile(r"([A-Z]+)(-?[0-9.]*)$")
+_MOVE = re.compile(r"X(-?[0-9.]+)Y(-?[0-9.]+)$")
+_BITE = re.compile(r"X(-?[0-9]+)Z([0-9]+)$")
+
+
+def commands(path, chunksize=65536):
+    """
+    Read the commands from a Gerber cloth cutter file.
+
+    The file is read in chunks, so the whole file is never in memory.
+
+    Arguments:
+        path: The input file
+        chunksize: Number of characters to read at once.
+
+    Yields:
+        The commands as strings.
+    """
+    rest = ""
+    with open(path) as df:
+        while True:
+            chunk = df.read(chunksize)
+            if not chunk:
+                break
+            items = (rest + chunk).split("*")
+            rest = items.pop()
+            yield from filter(None, items)
+    if rest:
+        yield rest
+
+
+def _number(s):
+    """Convert a string to an int, or a float if it is not an integer."""
+    try:
+        return int(s)
+    except ValueError:
+        return float(s)
+
+
+def parse(text):
+    """
+    Convert an NC command to a Command.
+
+    Arguments:
+        text: A single command.
+
+    Returns:
+        A Command.
+    """
+    kind = _SIMPLE.get(text)
+    if kind:
+        return Command(kind, text, ())
+    m = _MOVE.match(text)
+    if m:
+        try:
+            return Command("move", text, (_number(m.group(1)), _number(m.group(2))))
+        except ValueError:
+            return Command("text", text, ())
+    m = _BITE.match(text)
+    if m:
+        return Command("bite", text, (int(m.group(1)), int(m.group(2))))
+    m = _CODE.match(text)
+    if m:
+        if m.group(1) == "N" and m.group(2).isdigit():
+            return Command("piece", text, (int(m.group(2)),))
+        return Command("code", text, m.groups())
+    return Command("text", text, ())
+
+
+def read(path):
+    """
+    Read a Gerber cloth cutter file.
+
+    Arguments:
+        path: The input file
+
+    Yields:
+        A Command for every command in the file.
+    """
+    for text in commands(path):
+        yield parse(text)
+
+
 def segments(path):
     """
     Read a Gerber cloth cutter file and yield the line segments that it cuts.
@@ -194,35 +681,172 @@ def segments(path):
     Yields:
         Lists of (x, y) tuples
     """
-    downcmd = ("M14", "B")
-    upcmd = ("M15", "A")
-    stopcmd = ("M0", "M00")
-    with open(path) as df:
-        data = df.read()
-    items = data.split("*")
-    if len(items[-1]) == 0:
-        del items[-1]
     pos = (0, 0)
     segment = []
     down = False
-    for cmd in items:
-        if cmd in downcmd:
+    for cmd in read(path):
+        kind = cmd.kind
+        if kind == "down":
             down = True
             if not segment:
                 segment = [pos]
             elif segment[-1] != pos and len(segment) > 1:
                 yield segment
                 segment = [pos]
-        elif cmd in upcmd:
+        elif kind == "up":
             down = False
-        elif cmd in stopcmd:
+        elif kind == "stop":
             if segment and len(segment) > 1:
                 yield segment
             return
-        elif cmd.startswith("X"):
-            x, y = cmd[1:].split("Y")
+        elif kind == "move":
+            x, y = cmd.args
             x = round(float(x) * 25.4 / 100, 0)
             y = round(float(y) * 25.4 / 100, 0)
             pos = (x, y)
             if down:
                 segment.append(pos)
+
+
+class Program:
+    """
+    The moves of a Gerber cloth cutter file, stored in arrays.
+
+    The positions of the cutting head are stored in one array("d") as x0, y0,
+    x1, y1, … in mm. The first position is the origin. The array down
+    contains a 1 for every position that was reached with the knife down, so
+    move k runs from position k-1 to position k. The array pieces contains the
+    index of the first position of every piece, and the array holes the index
+    of every position where a hole is drilled (M43).
+    """
+
+    def __init__(self):
+        """Create an empty program."""
+        self.coords = array("d", [0.0, 0.0])
+        self.down = array("b", [0])
+        self.pieces = array("q")
+        self.holes = array("q")
+
+    def __len__(self):
+        """Return the number of positions."""
+        return len(self.down)
+
+    def _lengths(self):
+        """Return the lengths of all moves."""
+        c = self.coords
+        if np is not None and len(self.down) >= NPMIN:
+            xy = np.frombuffer(c).reshape(-1, 2)
+            d = np.diff(xy, axis=0)
+            return np.hypot(d[:, 0], d[:, 1])
+        xs, ys = c[0::2].tolist(), c[1::2].tolist()
+        dx = map(float.__sub__, xs[1:], xs[:-1])
+        dy = map(float.__sub__, ys[1:], ys[:-1])
+        return list(map(math.hypot, dx, dy))
+
+    def cutlength(self):
+        """Return the total length of the cuts in mm."""
+        lengths = self._lengths()
+        if np is not None and isinstance(lengths, np.ndarray):
+            return float(lengths[np.frombuffer(self.down, np.int8)[1:] == 1].sum())
+        return math.fsum(ln for ln, d in zip(lengths, self.down[1:]) if d)
+
+    def travel(self):
+        """Return the total length of the moves with the knife up in mm."""
+        lengths = self._lengths()
+        if np is not None and isinstance(lengths, np.ndarray):
+            return float(lengths[np.frombuffer(self.down, np.int8)[1:] == 0].sum())
+        return math.fsum(ln for ln, d in zip(lengths, self.down[1:]) if not d)
+
+    def bbox(self):
+        """
+        Return the bounding box (minx, miny, maxx, maxy) of the cuts.
+
+        Returns None if nothing is cut.
+        """
+        down = self.down
+        if np is not None and len(down) >= NPMIN:
+            d = np.frombuffer(down, np.int8) == 1
+            # Both ends of every cut.
+            d[:-1] |= d[1:]
+            if not d.any():
+                return None
+            xy = np.frombuffer(self.coords).reshape(-1, 2)[d]
+            (minx, miny), (maxx, maxy) = xy.min(axis=0), xy.max(axis=0)
+            return (float(minx), float(miny), float(maxx), float(maxy))
+        c = self.coords
+        idx = [
+            k
+            for k in range(len(down))
+            if down[k] or (k + 1 < len(down) and down[k + 1])
+        ]
+        if not idx:
+            return None
+        xs = [c[2 * k] for k in idx]
+        ys = [c[2 * k + 1] for k in idx]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def cuts(self):
+        """
+        Return the continuous cuts.
+
+        Lifting and lowering the knife without moving does not end a cut.
+
+        Returns:
+            A lines.Segments collection.
+        """
+        c = self.coords
+        down = self.down.tobytes()
+        n = len(down)
+        coords = array("d")
+        offsets = array("q", [0])
+        last = None
+        k = down.find(1)
+        while k > 0:
+            end = down.find(0, k)
+            if end < 0:
+                end = n
+            # The cut runs from position k-1 to end-1.
+            a = k - 1
+            if last is not None and c[2 * a : 2 * a + 2] == c[2 * last : 2 * last + 2]:
+                a = k
+            elif coords:
+                offsets.append(len(coords) // 2)
+            coords.extend(c[2 * a : 2 * end])
+            last = end - 1
+            k = down.find(1, end)
+        if coords:
+            offsets.append(len(coords) // 2)
+        return lines.Segments.fromarrays(coords, offsets)
+
+
+def program(path):
+    """
+    Read a Gerber cloth cutter file into a Program.
+
+    Arguments:
+        path: The input file
+
+    Returns:
+        A Program instance.
+    """
+    rv = Program()
+    coords, down, pieces = rv.coords, rv.down, rv.pieces
+    knife = 0
+    for cmd in read(path):
+        kind = cmd.kind
+        if kind == "move":
+            x, y = cmd.args
+            coords.append(x * 0.254)
+            coords.append(y * 0.254)
+            down.append(knife)
+        elif kind == "down":
+            knife = 1
+        elif kind == "up":
+            knife = 0
+        elif kind == "piece":
+            pieces.append(len(down))
+        elif kind == "stop":
+            break
+        elif cmd.text == "M43":
+            rv.holes.append(len(down) - 1)
+    return rv
@@ -31,23 +31,35 @@ Basically, a line segment is a list of two or more 2-tuples (x,y).
 
 Since line segments are lists, standard member functions like reverse() and
 len() can be used.
+
+For large numbers of segments, the Segments class stores all points in one
+array. Its items are SegmentView objects, that can be used as read-only
+segments.
 """
 
-import copy
+import itertools
 import math
+from array import array
+from collections import deque
 from nctools import dxfreader as dx
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 DEVLIM = 0.5  # maximum deviation from arc, spline
 EPSILON = 0.25  # maximum x and y between points that are considered equal
 
 
-def mksegments(entities, ndigits=3):
+def mksegments(entities, ndigits=3, packed=False):
     """
     Convert an iterable of entities to a list of line segments.
 
     Arguments:
         entities: An iterable if dictionaries, each containing a DXF entity.
         ndigits: Rounds to ndigits after the decimal point.
+        packed: Return a Segments instance instead of a list.
 
     Returns:
         A list of line segments. Line segments are lists of ≥2 (x,y) tuples.
@@ -64,8 +76,27 @@ def mksegments(entities, ndigits=3):
             (fr(dx.bycode(e, 11)), fr(dx.bycode(e, 21))),
         ]
 
+    # The points on arcs are calculated all at once by _arcpoints. Until then
+    # a segment is a list of parts. A part is either a list of points or an
+    # (index, skip) tuple; the points of arc number index, minus the first
+    # skip points.
+    arcs = []
+    circles = []
+
+    def addarc(cx, cy, R, sa, da, mincnt=1):
+        """Store the parameters of an arc and return its index."""
+        if DEVLIM > R:
+            cnt = mincnt
+        else:
+            maxstep = 2 * math.acos(1 - DEVLIM / R)
+            if da < 0:
+                maxstep = -maxstep
+            cnt = max(math.ceil(da / maxstep), mincnt)
+        arcs.append((cx, cy, R, sa, da / cnt, cnt))
+        return len(arcs) - 1
+
     def arc(e):
-        """Take an ARC entity and discretize it into line segments."""
+        """Take an ARC entity and store it for discretization."""
         cx, cy = float(dx.bycode(e, 10)), float(dx.bycode(e, 20))
         R = fr(dx.bycode(e, 40))
         sa, ea = (
@@ -76,20 +107,18 @@ def mksegments(entities, ndigits=3):
             da = ea - sa
         else:
             da = 2 * math.pi - sa + ea
-        if DEVLIM > R:
-            cnt = 1
-        else:
-            maxstep = 2 * math.acos(1 - DEVLIM / R)
-            if da < 0:
-                maxstep = -maxstep
-            cnt = math.ceil(da / maxstep)
-        step = da / cnt
-        angs = [sa + i * step for i in range(cnt + 1)]
-        pnts = [(fr(cx + R * math.cos(a)), fr(cy + R * math.sin(a))) for a in angs]
-        return pnts
+        return (addarc(cx, cy, R, sa, da), 0)
+
+    def circle(e):
+        """Take a CIRCLE entity and store it for discretization."""
+        cx, cy = float(dx.bycode(e, 10)), float(dx.bycode(e, 20))
+        R = fr(dx.bycode(e, 40))
+        n = addarc(cx, cy, R, 0.0, 2 * math.pi, 4)
+        circles.append(n)
+        return (n, 0)
 
     def arc2(sp, ep, cp, R):
-        """Discretize an arc into line segments"""
+        """Store an arc given by start, end and center point."""
         sv = (sp[0] - cp[0], sp[1] - cp[1])
         ev = (ep[0] - cp[0], ep[1] - cp[1])
         sa = math.atan2(sv[1], sv[0])
@@ -98,24 +127,14 @@ def mksegments(entities, ndigits=3):
             da = ea - sa
         else:
             da = 2 * math.pi - sa + ea
-        if DEVLIM > R:
-            cnt = 1
-        else:
-            maxstep = 2 * math.acos(1 - DEVLIM / R)
-            if da < 0:
-                maxstep = -maxstep
-            cnt = math.ceil(da / maxstep)
-        step = da / cnt
-        angs = [sa + i * step for i in range(cnt + 1)]
-        pnts = [
-            (fr(cp[0] + R * math.cos(a)), fr(cp[1] + R * math.sin(a))) for a in angs
-        ]
-        return pnts
+        return (addarc(cp[0], cp[1], R, sa, da), 0)
 
     # Convert lines
-    lines = [line(e) for e in entities if dx.bycode(e, 0) == "LINE"]
+    parts = [[line(e)] for e in entities if dx.bycode(e, 0) == "LINE"]
     # Convert arcs
-    lines += [arc(e) for e in entities if dx.bycode(e, 0) == "ARC"]
+    parts += [[arc(e)] for e in entities if dx.bycode(e, 0) == "ARC"]
+    # Convert circles
+    parts += [[circle(e)] for e in entities if dx.bycode(e, 0) == "CIRCLE"]
     # Convert polylines
     pi = [n for n, e in enumerate(entities) if dx.bycode(e, 0) == "POLYLINE"]
     se = [n for n, e in enumerate(entities) if dx.bycode(e, 0) == "SEQEND"]
@@ -123,22 +142,21 @@ def mksegments(entities, ndigits=3):
         end = [n for n in se if n > start][0]
         poly = entities[start:end]
         points = [(fr(dx.bycode(e, 10)), fr(dx.bycode(e, 20))) for e in poly[1:]]
-        angles = [
-            math.atan(float(dx.bycode(e, 42))) * 4 if 42 in e else None
-            for e in poly[1:]
-        ]
-        if 70 in poly[0] and (int(dx.bycode(poly[0], 70)) & 1):  # closed
+        bulges = [dx.bycode(e, 42) for e in poly[1:]]
+        angles = [math.atan(float(b)) * 4 if b != [] else None for b in bulges]
+        if int(dx.bycode(poly[0], 70) or 0) & 1:  # closed
             points.append(points[0])
         ends = zip(points, points[1:], angles)
-        addition = [points[0]]
+        addition = [[points[0]]]
         for sp, ep, a in ends:
             if a:
                 arcent = _arcdata(sp, ep, a)
-                addition += arc(arcent)[1:]
+                sa = math.atan2(sp[1] - arcent[20], sp[0] - arcent[10])
+                n = addarc(arcent[10], arcent[20], fr(arcent[40]), sa, a)
+                addition.append((n, 1))
             else:
-                addition.append(ep)
-        lines += [addition]
-    # TODO: Convert lwpolylines
+                addition.append([ep])
+        parts += [addition]
     lwpoly = [e for e in entities if dx.bycode(e, 0) == "LWPOLYLINE"]
     for poly in lwpoly:
         ends = []
@@ -155,13 +173,13 @@ def mksegments(entities, ndigits=3):
             elif k == 42:
                 b = float(v)
             elif k == 70:
-                if v == "1":
+                if int(v) & 1:
                     closed = True
         if x is not None:
             ends.append((x, y, b))
         if closed:
             ends.append(ends[0][:2])
-        addition = [ends[0][:2]]
+        addition = [[ends[0][:2]]]
         points = zip(ends, ends[1:])
         for sp, ep in points:
             if sp[2]:  # bulge present
@@ -176,13 +194,70 @@ def mksegments(entities, ndigits=3):
                 else:  # CW
                     offs = (chordvec[1] * cpoffs, -chordvec[0] * cpoffs)
                 cp = (midchord[0] + offs[0], midchord[1] + offs[1])
-                addition += arc2(sp[:2], ep[:2], cp, R)
+                addition.append(arc2(sp[:2], ep[:2], cp, R))
+            else:
+                addition.append([ep[:2]])
+        parts += [addition]
+    # Calculate the points on all arcs and assemble the segments.
+    arcpoints = _arcpoints(arcs, ndigits)
+    for n in circles:
+        arcpoints[n][-1] = arcpoints[n][0]
+    lines = []
+    for p in parts:
+        seg = []
+        for part in p:
+            if isinstance(part, tuple):
+                n, skip = part
+                seg += arcpoints[n][skip:]
             else:
-                addition.append(ep[:2])
-        lines += [addition]
+                seg += part
+        lines.append(seg)
+    if packed:
+        return Segments(lines)
     return lines
 
 
+def _arcpoints(arcs, ndigits):
+    """
+    Calculate the points on arcs.
+
+    If numpy is available, the points on all arcs are calculated in one go.
+    Note that numpy rounds halves slightly differently than round().
+
+    Arguments:
+        arcs: List of (cx, cy, R, start angle, step, count) tuples. Angles
+            are in radians.
+        ndigits: Rounds to ndigits after the decimal point.
+
+    Returns:
+        A list containing a list of count+1 (x,y) tuples for every arc.
+    """
+    if not arcs:
+        return []
+    if np is not None:
+        cx, cy, R, sa, step, cnt = (np.array(c) for c in zip(*arcs))
+        n = cnt + 1
+        ends = np.cumsum(n)
+        i = np.arange(ends[-1]) - np.repeat(ends - n, n)
+        a = np.repeat(sa, n) + i * np.repeat(step, n)
+        R = np.repeat(R, n)
+        x = np.round(np.repeat(cx, n) + R * np.cos(a), ndigits)
+        y = np.round(np.repeat(cy, n) + R * np.sin(a), ndigits)
+        pnts = list(zip(x.tolist(), y.tolist()))
+        return [pnts[e - k : e] for e, k in zip(ends.tolist(), n.tolist())]
+    cos, sin = math.cos, math.sin
+    rv = []
+    for cx, cy, R, sa, step, cnt in arcs:
+        angs = [sa + i * step for i in range(cnt + 1)]
+        rv.append(
+            [
+                (round(cx + R * cos(a), ndigits), round(cy + R * sin(a), ndigits))
+                for a in angs
+            ]
+        )
+    return rv
+
+
 def _eq(p, k):
     """
     Decide equality of points.
@@ -201,24 +276,48 @@ def _eq(p, k):
     return False
 
 
-def _grow_segment(segment, addition):
-    """Combine two segments into one, if possible."""
-    if _eq(segment[-1], addition[0]):  # append addition
-        return segment + addition[1:]
-    elif _eq(segment[-1], addition[-1]):  # append reversed addition
-        return segment + list(reversed(addition[:-1]))
-    elif _eq(segment[0], addition[-1]):  # prepend addition
-        return addition[:-1] + segment
-    elif _eq(segment[0], addition[0]):  # prepend reversed addition
-        return list(reversed(addition[1:])) + segment
+def _grow_contour(contour, addition):
+    """
+    Add a segment to a contour in place, if possible.
+
+    Arguments:
+        contour: A collections.deque of (x,y) tuples.
+        addition: A segment.
+
+    Returns:
+        True if the addition was added, False if it didn't fit.
+    """
+    if _eq(contour[-1], addition[0]):  # append addition
+        contour.extend(addition[1:])
+    elif _eq(contour[-1], addition[-1]):  # append reversed addition
+        contour.extend(reversed(addition[:-1]))
+    elif _eq(contour[0], addition[-1]):  # prepend addition
+        contour.extendleft(reversed(addition[:-1]))
+    elif _eq(contour[0], addition[0]):  # prepend reversed addition
+        contour.extendleft(addition[1:])
     else:
-        raise ValueError("addition doesn't fit segment")
+        return False
+    return True
+
+
+def _cell(p):
+    """Return the cell of the EPSILON sized grid that contains point p."""
+    return (math.floor(p[0] / EPSILON), math.floor(p[1] / EPSILON))
 
 
 def combine_segments(segments):
     """
     Combine the segments where possible.
 
+    Starting with the first remaining segment, the segment with the lowest
+    index that connects to either end of the contour is added to it, until
+    the contour is closed or nothing fits anymore.
+
+    The endpoints of the segments are stored in a grid with cells of
+    EPSILON×EPSILON. Since points closer than EPSILON are in the same or in
+    adjacent cells, only the nine cells around each end of the contour have
+    to be searched for connecting segments.
+
     Arguments:
         segments: List of segments. A segment is a list of two or more
             (x,y) tuples.
@@ -226,28 +325,64 @@ def combine_segments(segments):
     Returns:
         A list of closed segments and a list of open segments.
     """
+    grid = {}
+    for n, s in enumerate(segments):
+        for p in (s[0], s[-1]):
+            c = _cell(p)
+            if c in grid:
+                grid[c].add(n)
+            else:
+                grid[c] = {n}
+    used = bytearray(len(segments))
+    left = len(segments)
+    start = 0  # All segments before this index are used.
+
+    def take(n):
+        nonlocal left
+        for p in (segments[n][0], segments[n][-1]):
+            grid[_cell(p)].discard(n)
+        used[n] = 1
+        left -= 1
+
+    def candidates(p):
+        cx, cy = _cell(p)
+        for c in (
+            (cx - 1, cy - 1),
+            (cx - 1, cy),
+            (cx - 1, cy + 1),
+            (cx, cy - 1),
+            (cx, cy),
+            (cx, cy + 1),
+            (cx + 1, cy - 1),
+            (cx + 1, cy),
+            (cx + 1, cy + 1),
+        ):
+            if c in grid:
+                yield from grid[c]
+
     openseg = []
     loops = []
     first = None
-    segments = copy.deepcopy(segments)
-    while len(segments) > 0:
-        if not first:
-            first = segments.pop(0)
-        for second in segments:
-            try:
-                first = _grow_segment(first, second)
-                segments.remove(second)
+    while left > 0:
+        if first is None:
+            while used[start]:
+                start += 1
+            take(start)
+            first = deque(segments[start])
+        found = set(candidates(first[0]))
+        found.update(candidates(first[-1]))
+        for n in sorted(found):
+            if _grow_contour(first, segments[n]):
+                take(n)
                 if closed(first):
-                    loops.append(first)
+                    loops.append(list(first))
                     first = None
                 break
-            except ValueError:
-                continue
-        else:  # list exhausted, but no break
-            openseg.append(first)
+        else:  # nothing fits
+            openseg.append(list(first))
             first = None
     if first:
-        openseg.append(first)
+        openseg.append(list(first))
     return loops, openseg
 
 
@@ -303,6 +438,8 @@ def length(line):
     Returns:
         The sum of the lengths of the line segments between the listed points.
     """
+    if isinstance(line, SegmentView):
+        return line.length()
     dist = [
         math.sqrt((c - a) ** 2 + (d - b) ** 2)
         for ((a, b), (c, d)) in zip(line, line[1:])
@@ -322,9 +459,55 @@ def closed(line):
         True if the last point in the line equals the first point. False
         otherwise.
     """
+    if isinstance(line, SegmentView):
+        return line.closed()
     return _eq(line[0], line[-1])
 
 
+def circle(line, tolerance=None):
+    """
+    Determine if a line segment is a circle.
+
+    Arguments:
+        line: list of 2-tuples (x, y)
+        tolerance: maximum difference between the distance of a point to the
+            center and the radius. Defaults to DEVLIM.
+
+    Returns:
+        A tuple of the center and the radius, or None if the line is not a
+        circle.
+    """
+    if tolerance is None:
+        tolerance = DEVLIM
+    if len(line) < 5 or not closed(line):
+        return None
+    pts = list(line)[:-1]
+    cx = math.fsum(p[0] for p in pts) / len(pts)
+    cy = math.fsum(p[1] for p in pts) / len(pts)
+    dist = [math.hypot(p[0] - cx, p[1] - cy) for p in pts]
+    R = max(dist)
+    if R - min(dist) > tolerance:
+        return None
+    # The edges may not cut off more than the tolerance either.
+    for (ax, ay), (bx, by) in zip(pts, pts[1:] + pts[:1]):
+        if R - math.hypot((ax + bx) / 2 - cx, (ay + by) / 2 - cy) > tolerance:
+            return None
+    # The points must go around the center once; a polygon that doubles back
+    # can have all its points on a circle as well.
+    angs = [math.atan2(p[1] - cy, p[0] - cx) for p in pts + pts[:1]]
+    turn = 0.0
+    for a, b in zip(angs, angs[1:]):
+        d = b - a
+        if d > math.pi:
+            d -= 2 * math.pi
+        elif d < -math.pi:
+            d += 2 * math.pi
+        turn += d
+    if abs(abs(turn) - 2 * math.pi) > 1e-6:
+        return None
+    return (cx, cy), R
+
+
 def setstart(line, newstart):
     """
     Change the start point of a closed line segment.
@@ -340,6 +523,370 @@ def setstart(line, newstart):
     line.append(line[0])
 
 
+def _turns(line):
+    """
+    Calculate the change of direction at the inner points of a line.
+
+    This is calculated in the same way as gerbernc.Writer.moveto does.
+
+    Arguments:
+        line: list of 2-tuples (x, y)
+
+    Returns:
+        A list of angles in degrees between 0 and 180.
+    """
+    h = [
+        math.degrees(math.atan2(d - b, c - a)) for (a, b), (c, d) in zip(line, line[1:])
+    ]
+    rv = []
+    for p, q in zip(h, h[1:]):
+        d = abs(q - p)
+        if d > 180:
+            d = 360 - d
+        rv.append(d)
+    return rv
+
+
+def _distance(p, a, b):
+    """Return the distance from point p to the line segment from a to b."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    px, py = p[0] - a[0], p[1] - a[1]
+    ll = dx * dx + dy * dy
+    if ll > 0:
+        t = min(max((px * dx + py * dy) / ll, 0.0), 1.0)
+        px, py = px - t * dx, py - t * dy
+    return math.hypot(px, py)
+
+
+def simplify(line, tolerance=None, anglim=60):
+    """
+    Remove points from a line that deviate little from a straight path.
+
+    This uses the Douglas-Peucker algorithm. Points where the direction
+    changes more than anglim are always kept, since the knife will be lifted
+    there.
+
+    Arguments:
+        line: list of 2-tuples (x, y)
+        tolerance: maximum deviation of the new line from the removed points.
+            Defaults to DEVLIM.
+        anglim: limit of the angle between continuous cuts in degrees.
+
+    Returns:
+        A new list of 2-tuples.
+    """
+    if tolerance is None:
+        tolerance = DEVLIM
+    line = list(line)
+    if len(line) < 3:
+        return line
+    keep = [True] + [t > anglim for t in _turns(line)] + [True]
+    anchors = [n for n, k in enumerate(keep) if k]
+    stack = list(zip(anchors, anchors[1:]))
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = line[first], line[last]
+        dist, n = max((_distance(line[n], a, b), n) for n in range(first + 1, last))
+        if dist > tolerance:
+            keep[n] = True
+            stack += [(first, n), (n, last)]
+    return [p for p, k in zip(line, keep) if k]
+
+
+def _overlap(a, b, length, edge):
+    """
+    Find the part of the straight line from a to b that an edge also covers.
+
+    Arguments:
+        a, b: 2-tuples (x, y)
+        length: distance from a to b
+        edge: (c, d, length) tuple of an earlier edge.
+
+    Returns:
+        A (start, end) tuple of parameters along a-b, or None.
+    """
+    c, d, elen = edge
+    # Quick test; both ends of a duplicate or overlap lie close to line a-b.
+    ex, ey = b[0] - a[0], b[1] - a[1]
+    limit = 2 * EPSILON * length
+    if abs(ex * (c[1] - a[1]) - ey * (c[0] - a[0])) > limit:
+        return None
+    if abs(ex * (d[1] - a[1]) - ey * (d[0] - a[0])) > limit:
+        return None
+    if (_eq(a, c) and _eq(b, d)) or (_eq(a, d) and _eq(b, c)):
+        return (0.0, 1.0)
+    if length <= 2 * EPSILON or elen <= 2 * EPSILON:
+        return None
+    # Both edges have to lie on the same line.
+    for p, q, ln, others in ((a, b, length, (c, d)), (c, d, elen, (a, b))):
+        ex, ey = q[0] - p[0], q[1] - p[1]
+        for r in others:
+            if abs(ex * (r[1] - p[1]) - ey * (r[0] - p[0])) > EPSILON * ln:
+                return None
+    ux, uy = (b[0] - a[0]) / length**2, (b[1] - a[1]) / length**2
+    tc = (c[0] - a[0]) * ux + (c[1] - a[1]) * uy
+    td = (d[0] - a[0]) * ux + (d[1] - a[1]) * uy
+    lo, hi = max(min(tc, td), 0.0), min(max(tc, td), 1.0)
+    if (hi - lo) * length <= EPSILON:
+        return None
+    return (lo, hi)
+
+
+class _EdgeGrid:
+    """
+    Grid of straight edges, to find the edges near another edge quickly.
+
+    Every edge is stored only in the cells it crosses. A query looks in the
+    cells that touch a band around the queried edge.
+    """
+
+    def __init__(self, segments):
+        # Larger cells hold more edges, smaller ones are crossed more often.
+        # In huge drawings no edge should cross more than a few thousand.
+        self.size = 160 * EPSILON
+        if segments:
+            a, b, c, d = merge_bbox(bbox(s) for s in segments)
+            self.size = max(self.size, (c - a) / 4096, (d - b) / 4096)
+        self.grid = {}
+        self.edges = []
+
+    def _cells(self, a, b):
+        """Yield the cells that the line from a to b crosses, in order."""
+        s = self.size
+        i, j = math.floor(a[0] / s), math.floor(a[1] / s)
+        ie, je = math.floor(b[0] / s), math.floor(b[1] / s)
+        yield (i, j)
+        if i == ie and j == je:
+            return
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        si, sj = (1 if dx > 0 else -1), (1 if dy > 0 else -1)
+        # Parameters along a-b of the next vertical and horizontal cell border.
+        tx = ((i + (si > 0)) * s - a[0]) / dx if dx else math.inf
+        ty = ((j + (sj > 0)) * s - a[1]) / dy if dy else math.inf
+        stepx = s / abs(dx) if dx else math.inf
+        stepy = s / abs(dy) if dy else math.inf
+        for _ in range(abs(ie - i) + abs(je - j)):
+            if j == je or (i != ie and tx < ty):
+                i += si
+                tx += stepx
+            else:
+                j += sj
+                ty += stepy
+            yield (i, j)
+
+    def add(self, p, q):
+        n = len(self.edges)
+        self.edges.append((p, q, math.hypot(q[0] - p[0], q[1] - p[1])))
+        grid = self.grid
+        for c in self._cells(p, q):
+            grid.setdefault(c, []).append(n)
+
+    def near(self, a, b, length):
+        """Return the edges that may lie within EPSILON of the line a-b."""
+        # Cells that touch the band of 2*EPSILON around a-b are crossed by
+        # one of its long sides, since they are wider than the band.
+        d = 2 * EPSILON / length
+        ux, uy = (b[0] - a[0]) * d, (b[1] - a[1]) * d
+        found = set()
+        grid = self.grid
+        for nx, ny in ((-uy, ux), (uy, -ux)):
+            p = (a[0] - ux + nx, a[1] - uy + ny)
+            q = (b[0] + ux + nx, b[1] + uy + ny)
+            for c in self._cells(p, q):
+                found.update(grid.get(c, ()))
+        edges = self.edges
+        return [edges[k] for k in found]
+
+
+def _uncovered(s, grid):
+    """
+    Find the parts of a segment that no edge in a grid covers.
+
+    Arguments:
+        s: Segment; list of 2-tuples (x, y)
+        grid: _EdgeGrid instance
+
+    Returns:
+        A list of the remaining segments, a list of their edges as (p, q)
+        tuples, and the length that was removed.
+    """
+    pts = list(s)
+    pieces, cur, kept = [], [], []
+    removed = 0.0
+    for a, b in zip(pts, pts[1:]):
+        length = math.hypot(b[0] - a[0], b[1] - a[1])
+        if length == 0.0:
+            continue
+        covered = sorted(
+            filter(None, (_overlap(a, b, length, e) for e in grid.near(a, b, length)))
+        )
+        # The parts of a-b that are not covered.
+        free, t = [], 0.0
+        for lo, hi in covered:
+            if lo > t:
+                free.append((t, lo))
+            t = max(t, hi)
+        if t < 1.0:
+            free.append((t, 1.0))
+        if covered:
+            free = [(t0, t1) for t0, t1 in free if (t1 - t0) * length > EPSILON]
+        removed += length * (1.0 - sum(t1 - t0 for t0, t1 in free))
+        for t0, t1 in free:
+            p, q = a, b
+            if t0 > 0.0:
+                p = (a[0] + t0 * (b[0] - a[0]), a[1] + t0 * (b[1] - a[1]))
+            if t1 < 1.0:
+                q = (a[0] + t1 * (b[0] - a[0]), a[1] + t1 * (b[1] - a[1]))
+            if not (cur and cur[-1] == p):
+                if len(cur) > 1:
+                    pieces.append(cur)
+                cur = [p]
+            cur.append(q)
+            kept.append((p, q))
+        if not free or free[-1][1] < 1.0:
+            if len(cur) > 1:
+                pieces.append(cur)
+            cur = []
+    if len(cur) > 1:
+        pieces.append(cur)
+    if len(pieces) == 1 and pieces[0] == pts:
+        pieces = [s]
+    return pieces, kept, removed
+
+
+def dedup(segments):
+    """
+    Remove the parts of segments that an earlier segment already covers.
+
+    This finds exact duplicates, reversed duplicates and collinear overlaps
+    of straight parts within EPSILON. Curves are only found when they were
+    flattened into the same points. The edges of the segments are stored in
+    a grid, so only nearby edges are compared.
+
+    Arguments:
+        segments: List of segments; lists of 2-tuples (x, y)
+
+    Returns:
+        A list of segments, and the length in mm that was removed. Segments
+        without duplicate parts are returned unchanged.
+    """
+    grid = _EdgeGrid(segments)
+    rv = []
+    removed = 0.0
+    for s in segments:
+        pieces, kept, r = _uncovered(s, grid)
+        rv += pieces
+        removed += r
+        for p, q in kept:
+            grid.add(p, q)
+    return rv, removed
+
+
+def common(groups):
+    """
+    Remove the parts of segments that a segment in an earlier group covers.
+
+    Overlaps are found in the same way as in dedup, but only between groups.
+    So an edge that two groups share is kept in the first group only.
+
+    Arguments:
+        groups: List of lists of segments.
+
+    Returns:
+        A list of lists of segments, one for every group, and the length in
+        mm that was removed.
+    """
+    grid = _EdgeGrid([s for segments in groups for s in segments])
+    rv = []
+    removed = 0.0
+    for segments in groups:
+        done, edges = [], []
+        for s in segments:
+            pieces, kept, r = _uncovered(s, grid)
+            done += pieces
+            edges += kept
+            removed += r
+        for p, q in edges:
+            grid.add(p, q)
+        rv.append(done)
+    return rv, removed
+
+
+def _inside(p, poly):
+    """
+    Determine if a point lies inside a closed polygon (even-odd rule).
+
+    Arguments:
+        p: 2-tuple (x, y)
+        poly: list of 2-tuples (x, y), with the last point equal to the first.
+
+    Returns:
+        True if p is inside poly.
+    """
+    x, y = p
+    rv = False
+    for (ax, ay), (bx, by) in zip(poly, poly[1:]):
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            rv = not rv
+    return rv
+
+
+def nesting(segments):
+    """
+    Find the closed segment that each segment lies in.
+
+    Candidates are closed segments whose bounding box contains that of the
+    segment, found with a grid. A point halfway along the segment is then
+    tested against them.
+
+    Arguments:
+        segments: list of segments; lists of 2-tuples (x, y)
+
+    Returns:
+        A list with for each segment the index of the smallest closed segment
+        that contains it, or None.
+    """
+    rv = [None] * len(segments)
+    boxes = [bbox(s) for s in segments]
+    outer = [n for n, s in enumerate(segments) if len(s) > 3 and closed(s)]
+    if not outer:
+        return rv
+    minx = min(boxes[n][0] for n in outer)
+    miny = min(boxes[n][1] for n in outer)
+    w = max(boxes[n][2] for n in outer) - minx
+    h = max(boxes[n][3] for n in outer) - miny
+    size = max(math.sqrt(w * h / len(outer)), max(w, h) / len(outer), 1.0)
+    area = {n: (boxes[n][2] - boxes[n][0]) * (boxes[n][3] - boxes[n][1]) for n in outer}
+    cells = {}
+    # Smallest first, so the first match is the tightest.
+    for n in sorted(outer, key=area.get):
+        a, b, c, d = boxes[n]
+        for i in range(int((a - minx) / size), int((c - minx) / size) + 1):
+            for j in range(int((b - miny) / size), int((d - miny) / size) + 1):
+                cells.setdefault((i, j), []).append(n)
+    polys = {}
+    for k, s in enumerate(segments):
+        half = len(s) // 2
+        p, q = s[half - 1], s[half]
+        p = ((p[0] + q[0]) / 2, (p[1] + q[1]) / 2)
+        cell = (math.floor((p[0] - minx) / size), math.floor((p[1] - miny) / size))
+        a, b, c, d = boxes[k]
+        own = (c - a) * (d - b)
+        for n in cells.get(cell, ()):
+            oa, ob, oc, od = boxes[n]
+            if n == k or area[n] <= own:
+                continue
+            if oa <= a and ob <= b and oc >= c and od >= d:
+                if n not in polys:
+                    polys[n] = list(segments[n])
+                if _inside(p, polys[n]):
+                    rv[k] = n
+                    break
+    return rv
+
+
 def bbox(line):
     """
     Calculate the bounding box around a line.
@@ -350,6 +897,8 @@ def bbox(line):
     Returns:
         a 4-tuple (minx, miny, maxx, maxy).
     """
+    if isinstance(line, SegmentView):
+        return line.bbox()
     x = [p[0] for p in line]
     y = [p[1] for p in line]
     return (min(x), min(y), max(x), max(y))
@@ -387,3 +936,194 @@ def merge_bbox(bboxes):
         maxx.append(c)
         maxy.append(d)
     return (min(minx), min(miny), max(maxx), max(maxy))
+
+
+class Segments:
+    """
+    A collection of line segments, stored in arrays.
+
+    The coordinates of all points are stored in one array("d") as x0, y0, x1,
+    y1, …. The array offsets contains the index of the first point of every
+    segment, followed by the total number of points. So segment n consists of
+    the points offsets[n] up to offsets[n+1].
+    """
+
+    __slots__ = ("coords", "offsets")
+
+    def __init__(self, segments=()):
+        """
+        Create the collection.
+
+        Arguments:
+            segments: Iterable of segments to add.
+        """
+        self.coords = array("d")
+        self.offsets = array("q", [0])
+        for s in segments:
+            self.append(s)
+
+    @classmethod
+    def fromarrays(cls, coords, offsets):
+        """Create a collection from existing coordinate and offset arrays."""
+        rv = cls()
+        rv.coords = coords
+        rv.offsets = offsets
+        return rv
+
+    def append(self, segment):
+        """Add a segment (an iterable of (x,y) tuples) to the collection."""
+        for x, y in segment:
+            self.coords.append(x)
+            self.coords.append(y)
+        self.offsets.append(len(self.coords) // 2)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("segment index out of range")
+        return SegmentView(self.coords, self.offsets[n], self.offsets[n + 1])
+
+    def __iter__(self):
+        coords = self.coords
+        offsets = self.offsets
+        for start, end in zip(offsets, offsets[1:]):
+            yield SegmentView(coords, start, end)
+
+    def __eq__(self, other):
+        if isinstance(other, Segments):
+            return self.coords == other.coords and self.offsets == other.offsets
+        return NotImplemented
+
+    def tolist(self):
+        """Return the segments as a list of lists of (x,y) tuples."""
+        return [list(s) for s in self]
+
+    def npoints(self):
+        """Return the total number of points."""
+        return self.offsets[-1]
+
+    def bboxes(self):
+        """Return a list of the bounding boxes of all segments."""
+        xs = self.coords[0::2].tolist()
+        ys = self.coords[1::2].tolist()
+        offsets = self.offsets
+        rv = []
+        for a, b in zip(offsets, offsets[1:]):
+            x, y = xs[a:b], ys[a:b]
+            rv.append((min(x), min(y), max(x), max(y)))
+        return rv
+
+    def bbox(self):
+        """Return the bounding box of all segments."""
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def lengths(self):
+        """Return a list of the lengths of all segments."""
+        xs = self.coords[0::2].tolist()
+        ys = self.coords[1::2].tolist()
+        dx = map(float.__sub__, xs[1:], xs[:-1])
+        dy = map(float.__sub__, ys[1:], ys[:-1])
+        # Cumulative distance along all points, including the jumps between
+        # segments. The jumps fall out when subtracting.
+        cum = list(itertools.accumulate(map(math.hypot, dx, dy), initial=0.0))
+        offsets = self.offsets
+        return [cum[b - 1] - cum[a] for a, b in zip(offsets, offsets[1:])]
+
+    def closed(self):
+        """Return a list of flags that indicate if each segment is closed."""
+        c = self.coords
+        offsets = self.offsets
+        return [
+            abs(c[2 * a] - c[2 * b - 2]) < EPSILON
+            and abs(c[2 * a + 1] - c[2 * b - 1]) < EPSILON
+            for a, b in zip(offsets, offsets[1:])
+        ]
+
+
+class SegmentView:
+    """
+    A read-only view of a segment in a Segments collection.
+
+    It can be used like a list of (x,y) tuples. Slices with a step of 1 are
+    views as well. No points are copied.
+    """
+
+    __slots__ = ("coords", "start", "end")
+
+    def __init__(self, coords, start, end):
+        """
+        Create the view.
+
+        Arguments:
+            coords: array of coordinates, see Segments.
+            start: index of the first point.
+            end: index after the last point.
+        """
+        self.coords = coords
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            a, b, step = n.indices(len(self))
+            if step == 1:
+                return SegmentView(self.coords, self.start + a, self.start + max(a, b))
+            return [self[k] for k in range(a, b, step)]
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("point index out of range")
+        i = 2 * (self.start + n)
+        return (self.coords[i], self.coords[i + 1])
+
+    def __iter__(self):
+        c = self.coords
+        return zip(
+            c[2 * self.start : 2 * self.end : 2],
+            c[2 * self.start + 1 : 2 * self.end : 2],
+        )
+
+    def __reversed__(self):
+        c = self.coords
+        xs = c[2 * self.start : 2 * self.end : 2]
+        ys = c[2 * self.start + 1 : 2 * self.end : 2]
+        return zip(reversed(xs), reversed(ys))
+
+    def __eq__(self, other):
+        if isinstance(other, (SegmentView, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return "SegmentView({!r})".format(list(self))
+
+    def bbox(self):
+        """Return the bounding box (minx, miny, maxx, maxy)."""
+        c = self.coords
+        xs = c[2 * self.start : 2 * self.end : 2]
+        ys = c[2 * self.start + 1 : 2 * self.end : 2]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def length(self):
+        """Return the length of the segment."""
+        c = self.coords
+        xs = c[2 * self.start : 2 * self.end : 2]
+        ys = c[2 * self.start + 1 : 2 * self.end : 2]
+        dx = map(float.__sub__, xs[1:], xs[:-1])
+        dy = map(float.__sub__, ys[1:], ys[:-1])
+        return sum(map(math.hypot, dx, dy))
+
+    def closed(self):
+        """Return True if the first and last point are equal."""
+        c = self.coords
+        a, b = 2 * self.start, 2 * self.end
+        return abs(c[a] - c[b - 2]) < EPSILON and abs(c[a + 1] - c[b - 1]) < EPSILON
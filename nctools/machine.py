@@ -0,0 +1,298 @@
+# file: machine.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+# Created: 2026-10-18T15:41:09+0200
+# Last modified: 2026-10-18T15:41:09+0200
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY AUTHOR AND CONTRIBUTORS "AS IS" AND ANY EXPRESS
+# OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN
+# NO EVENT SHALL AUTHOR OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Estimating how long a Gerber cloth cutter takes to run a program.
+
+The machine parameters are read from a report in the format that the
+C-200MT controller prints; see doc/machine-parameters.txt.
+
+The estimate uses a simple model. The head accelerates at a constant rate
+at the start of every move with the knife up, and of every continuous cut.
+It decelerates in the same way at the end. Lifting and plunging the knife
+and sharpening it take a fixed time.
+"""
+
+import math
+
+CATEGORIES = ("cutting", "dry haul", "lifts", "sharpening")
+
+# Parameters used for the estimate, with their values for our machine. The
+# last five are not in the controller's report. The dry haul speed comes
+# from doc/machine.txt, the others are estimates.
+DEFAULTS = {
+    "Cut Speed=Maximum Knife Speed": "6",
+    "Maximum Cut Velocity": "4572",
+    "Feed Rate": "100",
+    "M25 Slowdown Percentage": "75",
+    "Slowdown Codes": "USE",
+    "Sharpen Frequency": "381",
+    "Sharpening Time": "0.02",
+    "Number of Sides to Sharpen": "2",
+    "Sharpen Every n Pieces": "0",
+    "Sharpen (M42) Codes": "IGNORE",
+    "Lift + Plunge (M46) Codes": "USE",
+    "Minimum Bite Length": "127.00",
+    "Maximum Bite Length": "139.70",
+    "Minimum Size of First Bite": "76.20",
+    "Dry Haul Velocity": "5472",
+    "Acceleration": "250",
+    "Knife Lift Time": "0.2",
+    "Knife Plunge Time": "0.3",
+    "Lift + Plunge Time": "0.25",
+}
+
+CM = 0.0254  # centimeters per unit of the NC program (1/100 in).
+
+
+def read(path):
+    """
+    Read machine parameters.
+
+    Parameters that are not in the file keep their value from DEFAULTS.
+
+    Arguments:
+        path: Name of a file in the format of doc/machine-parameters.txt.
+
+    Returns:
+        A dict of parameter names and values as strings.
+    """
+    rv = dict(DEFAULTS)
+    cols = None
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            line = line.rstrip()
+            if line.startswith("Parameter Name"):
+                cols = [line.index(k) for k in ("Units", "Current", "Default", "Range")]
+                continue
+            if cols is None or not line or line.startswith("-"):
+                continue
+            name = line[: cols[0]].strip()
+            value = line[cols[1] : cols[2]].strip() or line[cols[2] : cols[3]].strip()
+            if name and value:
+                rv[name] = value
+    if cols is None:
+        raise ValueError("no machine parameters found in '{}'".format(path))
+    return rv
+
+
+def _movetime(d, v, a):
+    """
+    Calculate the time to move from standstill to standstill.
+
+    Arguments:
+        d: Distance in cm.
+        v: Maximum speed in cm/s.
+        a: Acceleration in cm/s².
+
+    Returns:
+        The time in seconds.
+    """
+    if d <= 0.0:
+        return 0.0
+    if d >= v * v / a:
+        return d / v + v / a
+    return 2 * math.sqrt(d / a)
+
+
+def estimate(cmds, params=None):
+    """
+    Estimate the time it takes to run an NC program.
+
+    Arguments:
+        cmds: Iterable of gerbernc.Command.
+        params: Dict of machine parameters, see read(). Defaults to DEFAULTS.
+
+    Returns:
+        A dict with a dict of times in seconds per category for each piece.
+        Commands before the first N command count as piece 0, which is left
+        out if it takes no time.
+    """
+    p = dict(DEFAULTS)
+    if params:
+        p.update(params)
+
+    def num(name):
+        return float(p[name])
+
+    feed = num("Feed Rate") / 100
+    vcut = min(num("Cut Speed=Maximum Knife Speed") * 305, num("Maximum Cut Velocity"))
+    vcut *= feed / 60
+    vdry = num("Dry Haul Velocity") * feed / 60
+    acc = num("Acceleration")
+    slow = num("M25 Slowdown Percentage") / 100
+    useslow = p["Slowdown Codes"] == "USE"
+    freq = num("Sharpen Frequency")
+    tsharp = num("Sharpening Time") * num("Number of Sides to Sharpen")
+    everyn = int(num("Sharpen Every n Pieces"))
+    usem42 = p["Sharpen (M42) Codes"] == "USE"
+    usem46 = p["Lift + Plunge (M46) Codes"] == "USE"
+    tlift, tplunge = num("Knife Lift Time"), num("Knife Plunge Time")
+    tcorner = num("Lift + Plunge Time")
+    rv = {}
+    times = rv.setdefault(0, dict.fromkeys(CATEGORIES, 0.0))
+    pos, down, factor, inhibit = (0, 0), False, 1.0, False
+    run = runtime = since = 0.0
+    pieces = 0
+
+    def endrun():
+        # Cutting time including acceleration and deceleration.
+        nonlocal run, runtime
+        times["cutting"] += runtime + _movetime(run, vcut, acc) - run / vcut
+        run = runtime = 0.0
+
+    def sharpen():
+        nonlocal since
+        times["sharpening"] += tsharp
+        since = 0.0
+
+    for cmd in cmds:
+        kind = cmd.kind
+        if kind == "move":
+            d = math.hypot(cmd.args[0] - pos[0], cmd.args[1] - pos[1]) * CM
+            pos = cmd.args
+            if down:
+                run += d
+                runtime += d / (vcut * factor)
+                since += d
+                if freq > 0 and since >= freq and not inhibit:
+                    sharpen()
+            else:
+                times["dry haul"] += _movetime(d, vdry, acc)
+        elif kind == "down":
+            if not down:
+                times["lifts"] += tplunge
+                down = True
+        elif kind == "up":
+            if down:
+                endrun()
+                times["lifts"] += tlift
+                down = False
+        elif kind == "piece":
+            times = rv.setdefault(cmd.args[0], dict.fromkeys(CATEGORIES, 0.0))
+            pieces += 1
+            if everyn > 0 and pieces % everyn == 0:
+                sharpen()
+        elif kind == "stop":
+            break
+        elif cmd.text == "M46" and usem46:
+            times["lifts"] += tcorner
+        elif cmd.text == "M25" and useslow:
+            factor = slow
+        elif cmd.text == "M26":
+            factor = 1.0
+        elif cmd.text == "M41":
+            inhibit = True
+        elif cmd.text == "M40":
+            inhibit = False
+            if freq > 0 and since >= freq:
+                sharpen()
+        elif cmd.text == "M42" and usem42:
+            sharpen()
+    if down:
+        endrun()
+    if not any(rv[0].values()):
+        del rv[0]
+    return rv
+
+
+def total(times):
+    """
+    Add up the times of all pieces.
+
+    Arguments:
+        times: Dict returned by estimate().
+
+    Returns:
+        A dict of the total time per category.
+    """
+    rv = dict.fromkeys(CATEGORIES, 0.0)
+    for t in times.values():
+        for c in CATEGORIES:
+            rv[c] += t[c]
+    return rv
+
+
+def corners(lifts, plunges, params=None):
+    """
+    Estimate the time spent on the knife in corners.
+
+    The time to slow down and speed up for a lifted knife is not included.
+
+    Arguments:
+        lifts: Number of corners where the knife is raised and lowered.
+        plunges: Number of lift and plunge (M46) corners.
+        params: Dict of machine parameters, see read(). Defaults to DEFAULTS.
+
+    Returns:
+        A tuple of the times in seconds for both kinds of corners.
+    """
+    p = dict(DEFAULTS)
+    if params:
+        p.update(params)
+    tlift = float(p["Knife Lift Time"]) + float(p["Knife Plunge Time"])
+    if p["Lift + Plunge (M46) Codes"] != "USE":
+        return lifts * tlift, 0.0
+    return lifts * tlift, plunges * float(p["Lift + Plunge Time"])
+
+
+def bitelimits(params=None):
+    """
+    Find the limits for the length of conveyor bites.
+
+    Arguments:
+        params: Dict of machine parameters, see read(). Defaults to DEFAULTS.
+
+    Returns:
+        A tuple of the minimum and maximum bite length and the minimum size of
+        the first bite, in mm.
+    """
+    p = dict(DEFAULTS)
+    if params:
+        p.update(params)
+    names = (
+        "Minimum Bite Length",
+        "Maximum Bite Length",
+        "Minimum Size of First Bite",
+    )
+    return tuple(float(p[n]) * 10 for n in names)
+
+
+def describe(times):
+    """
+    Describe the total time for one piece or program.
+
+    Arguments:
+        times: Dict of times per category.
+
+    Returns:
+        A string with the total time and the time for each category.
+    """
+    s = sum(times.values())
+    parts = ["{} {:.1f} s".format(c, times[c]) for c in CATEGORIES]
+    return "{:.1f} s ({}:{:02d}:{:02d}); {}".format(
+        s, int(s // 3600), int(s % 3600 // 60), int(s % 60), ", ".join(parts)
+    )
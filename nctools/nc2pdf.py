@@ -64,7 +64,7 @@ def main():
         logging.info('starting file "{}"'.format(fn))
         try:
             ofn = utils.outname(fn, extension=".pdf", addenum="_nc")
-            cuts = list(gerbernc.segments(fn))
+            prog = gerbernc.program(fn)
         except ValueError as e:
             logging.info(str(e))
             fns = "cannot construct output filename. Skipping file '{}'."
@@ -74,12 +74,15 @@ def main():
             logging.info("cannot read file: {}".format(e))
             logging.error("i/o error, skipping file '{}'".format(fn))
             continue
-        cnt = len(cuts)
-        logging.info("got {} cuts".format(cnt))
-        xvals = [pnt[0] for s in cuts for pnt in s]
-        yvals = [pnt[1] for s in cuts for pnt in s]
-        minx, maxx = min(xvals), max(xvals)
-        miny, maxy = min(yvals), max(yvals)
+        bbox = prog.bbox()
+        if bbox is None:
+            logging.error("no cuts found, skipping file '{}'".format(fn))
+            continue
+        cuts = prog.cuts()
+        logging.info("got {} cuts".format(len(cuts)))
+        fs = "cutting {:.0f} mm, travel {:.0f} mm"
+        logging.info(fs.format(prog.cutlength(), prog.travel()))
+        minx, miny, maxx, maxy = bbox
         bs = "{} range from {:.1f} mm to {:.1f} mm"
         logging.info(bs.format("X", minx, maxx))
         logging.info(bs.format("Y", miny, maxy))
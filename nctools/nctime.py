@@ -0,0 +1,93 @@
+# file: nctime.py
+# vim:fileencoding=utf-8:fdm=marker:ft=python
+# nctime - main program
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T15:58:31+0200
+# Last modified: 2026-10-18T15:58:31+0200
+"""Estimate how long a Gerber cloth cutter takes to run NC files."""
+
+import argparse
+import logging
+import sys
+from nctools import gerbernc, machine, utils
+from nctools import __VERSION__, __LICENSE__
+
+_CP = f"""nctime {__VERSION__}
+Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+"""
+
+
+class LicenseAction(argparse.Action):
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(_CP)
+        print(__LICENSE__)
+        sys.exit()
+
+
+def process_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-m",
+        "--machine",
+        metavar="file",
+        help="file with machine parameters in the format of the controller's report",
+    )
+    parser.add_argument(
+        "--log",
+        default="warning",
+        choices=["debug", "info", "warning", "error"],
+        help="logging level (defaults to 'warning')",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "-L", "--license", action=LicenseAction, nargs=0, help="print the license"
+    )
+    group.add_argument("-v", "--version", action="version", version=__VERSION__)
+    parser.add_argument(
+        "files", nargs="*", help="one or more file names", metavar="file"
+    )
+    args = parser.parse_args(sys.argv[1:])
+    logging.basicConfig(
+        level=getattr(logging, args.log.upper(), None),
+        format="%(levelname)s: %(message)s",
+    )
+    logging.debug("command line arguments = {}".format(sys.argv))
+    logging.debug("parsed arguments = {}".format(args))
+    if not args.files:
+        parser.print_help()
+        sys.exit(0)
+    return args
+
+
+def main():
+    """
+    Entry point for nctime.py.
+    """
+    args = process_arguments()
+    params = None
+    if args.machine:
+        try:
+            params = machine.read(args.machine)
+        except (ValueError, IOError) as ex:
+            logging.error(str(ex))
+            sys.exit(1)
+    for fn in utils.xpand(args.files):
+        try:
+            times = machine.estimate(gerbernc.read(fn), params)
+        except ValueError as ex:
+            logging.info(str(ex))
+            logging.error("error during processing. Skipping file '{}'.".format(fn))
+            continue
+        except IOError as ex:
+            logging.info(str(ex))
+            logging.error("i/o error in file '{}'. Skipping it.".format(fn))
+            continue
+        print("File '{}': {}".format(fn, machine.describe(machine.total(times))))
+        for piece, t in times.items():
+            print("  piece {}: {}".format(piece, machine.describe(t)))
+
+
+if __name__ == "__main__":
+    main()
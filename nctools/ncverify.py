@@ -0,0 +1,145 @@
+# file: ncverify.py
+# vim:fileencoding=utf-8:fdm=marker:ft=python
+# ncverify - main program
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T17:31:40+0200
+# Last modified: 2026-10-18T17:31:40+0200
+"""Check that Gerber NC files cut exactly the segments of their DXF files."""
+
+import argparse
+import logging
+import sys
+from nctools import cache, gerbernc, utils, verify
+from nctools import __VERSION__, __LICENSE__
+
+_CP = f"""ncverify {__VERSION__}
+Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+"""
+
+
+class LicenseAction(argparse.Action):
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(_CP)
+        print(__LICENSE__)
+        sys.exit()
+
+
+def report(what, gaps):
+    """
+    Log the gaps and return a summary.
+
+    Arguments:
+        what: Description of the gaps.
+        gaps: List of (length, points) tuples.
+
+    Returns:
+        A string with the number and total length of the gaps.
+    """
+    for length, pts in gaps:
+        (x1, y1), (x2, y2) = pts[0], pts[-1]
+        fs = "{} {:.1f} mm from ({:.1f}, {:.1f}) to ({:.1f}, {:.1f})"
+        logging.info(fs.format(what, length, x1, y1, x2, y2))
+    total = sum(length for length, _ in gaps)
+    return "{} {} ({:.1f} mm)".format(len(gaps), what, total)
+
+
+def process_arguments():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        metavar="mm",
+        type=float,
+        default=1.0,
+        help="maximum distance between a cut and the drawing (defaults to 1 mm)",
+    )
+    parser.add_argument(
+        "-n",
+        "--nc",
+        metavar="file",
+        help="NC file to compare with; only for a single DXF file "
+        "(defaults to the name that dxf2nc writes)",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="dir",
+        help="directory to cache flattened DXF files in (off by default)",
+    )
+    parser.add_argument(
+        "--log",
+        default="warning",
+        choices=["debug", "info", "warning", "error"],
+        help="logging level (defaults to 'warning')",
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "-L", "--license", action=LicenseAction, nargs=0, help="print the license"
+    )
+    group.add_argument("-v", "--version", action="version", version=__VERSION__)
+    parser.add_argument(
+        "files", nargs="*", help="one or more DXF file names", metavar="file"
+    )
+    args = parser.parse_args(sys.argv[1:])
+    logging.basicConfig(
+        level=getattr(logging, args.log.upper(), None),
+        format="%(levelname)s: %(message)s",
+    )
+    logging.debug("command line arguments = {}".format(sys.argv))
+    logging.debug("parsed arguments = {}".format(args))
+    if not args.files:
+        parser.print_help()
+        sys.exit(0)
+    return args
+
+
+def main():
+    """
+    Entry point for ncverify.py.
+
+    The exit status is 1 if any file does not match.
+    """
+    args = process_arguments()
+    files = utils.xpand(args.files)
+    if args.nc and len(files) > 1:
+        logging.error("the --nc option can only be used with a single DXF file")
+        sys.exit(1)
+    status = 0
+    for f in files:
+        try:
+            ncname = args.nc or utils.outname(f, extension=".nc")
+            bylayer = cache.segments(f, cachedir=args.cache)
+            prog = gerbernc.program(ncname)
+            holes = [(prog.coords[2 * k], prog.coords[2 * k + 1]) for k in prog.holes]
+            segments = [s for layer in bylayer.values() for s in layer]
+            segments, holes = verify.drilled(segments, holes, args.tolerance)
+            missing, extra = verify.compare(segments, prog.cuts(), args.tolerance)
+        except ValueError as ex:
+            logging.info(str(ex))
+            logging.error("error during processing. Skipping file '{}'.".format(f))
+            status = 1
+            continue
+        except IOError as ex:
+            logging.info(str(ex))
+            logging.error("i/o error in file '{}'. Skipping it.".format(f))
+            status = 1
+            continue
+        if missing or extra or holes:
+            status = 1
+            fs = "File '{}' does not match '{}': {}, {}."
+            a = report("not cut", missing)
+            b = report("extra cuts", extra)
+            if holes:
+                b += ", {} extra holes".format(len(holes))
+                for x, y in holes:
+                    logging.info("extra hole at ({:.1f}, {:.1f})".format(x, y))
+            print(fs.format(f, ncname, a, b))
+        else:
+            fs = "File '{}' matches '{}' within {} mm."
+            print(fs.format(f, ncname, args.tolerance))
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
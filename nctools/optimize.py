@@ -0,0 +1,419 @@
+# file: optimize.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+# Created: 2026-10-18T12:03:51+0200
+# Last modified: 2026-10-18T12:03:51+0200
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY AUTHOR AND CONTRIBUTORS "AS IS" AND ANY EXPRESS
+# OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN
+# NO EVENT SHALL AUTHOR OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Optimizing the cutting order of line segments.
+
+Moving the head with the knife raised (dry haul) takes machine time without
+cutting anything. The functions in this module order segments to keep the
+travel between cuts short.
+"""
+
+import math
+import time
+from nctools import lines
+
+
+def travel(segments, start=(0.0, 0.0)):
+    """
+    Calculate the distance traveled between cuts.
+
+    Arguments:
+        segments: List of segments, in cutting order.
+        start: Position of the head before the first cut.
+
+    Returns:
+        The sum of the distances from the end of each segment (or the start
+        position) to the beginning of the next segment.
+    """
+    total = 0.0
+    pos = start
+    for s in segments:
+        p = s[0]
+        total += math.hypot(p[0] - pos[0], p[1] - pos[1])
+        pos = s[-1]
+    return total
+
+
+def _reverse(s):
+    """Return an open segment reversed, a closed segment unchanged."""
+    if lines.closed(s):
+        return s
+    return list(reversed(s))
+
+
+class _Grid:
+    """Grid of points for finding the nearest point."""
+
+    def __init__(self, entries):
+        """
+        Create the grid.
+
+        Arguments:
+            entries: List of (point, key) tuples.
+        """
+        xs = [p[0] for p, _ in entries]
+        ys = [p[1] for p, _ in entries]
+        self.minx, self.miny = min(xs), min(ys)
+        w, h = max(xs) - self.minx, max(ys) - self.miny
+        # Aim for about one point per cell.
+        self.size = max(math.sqrt(w * h / len(entries)), max(w, h) / len(entries), 1.0)
+        self.ni = int(w / self.size) + 1
+        self.nj = int(h / self.size) + 1
+        self.cells = {}
+        self.where = {}
+        for p, key in entries:
+            c = self._cell(p)
+            self.cells.setdefault(c, []).append((p, key))
+            self.where.setdefault(key, []).append(c)
+        self.count = len(entries)
+
+    def _cell(self, p):
+        return (
+            int((p[0] - self.minx) / self.size),
+            int((p[1] - self.miny) / self.size),
+        )
+
+    def __len__(self):
+        return self.count
+
+    def remove(self, key):
+        """Remove all points with the given key."""
+        for c in self.where.pop(key):
+            before = len(self.cells[c])
+            self.cells[c] = [e for e in self.cells[c] if e[1] != key]
+            self.count -= before - len(self.cells[c])
+
+    def _ring(self, ci, cj, r):
+        """Yield the cells in the grid at distance r from cell (ci, cj)."""
+        if r == 0:
+            yield (ci, cj)
+            return
+        ilo, ihi = max(ci - r, 0), min(ci + r, self.ni - 1)
+        jlo, jhi = max(cj - r, 0), min(cj + r, self.nj - 1)
+        for j in (cj - r, cj + r):
+            if 0 <= j < self.nj:
+                for i in range(ilo, ihi + 1):
+                    yield (i, j)
+        for i in (ci - r, ci + r):
+            if 0 <= i < self.ni:
+                for j in range(max(jlo, cj - r + 1), min(jhi, cj + r - 1) + 1):
+                    yield (i, j)
+
+    def nearest(self, p):
+        """
+        Find the point nearest to p.
+
+        The cells are searched in square rings around the cell of p, until
+        no cell that is left can contain a closer point.
+
+        Returns:
+            A (distance, key) tuple, or None if the grid is empty.
+        """
+        if not self.count:
+            return None
+        ci, cj = self._cell(p)
+        # Distance in cells from (ci, cj) to the grid, and to its far side.
+        r = max(0, -ci, ci - self.ni + 1, -cj, cj - self.nj + 1)
+        rmax = max(abs(ci), abs(ci - self.ni + 1), abs(cj), abs(cj - self.nj + 1))
+        best = None
+        while r <= rmax:
+            if best is not None and best[0] <= (r - 1) * self.size:
+                break
+            for c in self._ring(ci, cj, r):
+                for q, key in self.cells.get(c, ()):
+                    d = (math.hypot(q[0] - p[0], q[1] - p[1]), key)
+                    if best is None or d < best:
+                        best = d
+            r += 1
+        return best
+
+
+def nearest(segments, start=(0.0, 0.0)):
+    """
+    Order segments by repeatedly cutting the nearest one next.
+
+    Open segments can be entered from either end; they are reversed when
+    that is shorter. Closed segments are entered at their first point.
+
+    Arguments:
+        segments: List of segments.
+        start: Position of the head before the first cut.
+
+    Returns:
+        A new list of segments.
+    """
+    if not segments:
+        return []
+    entries = []
+    for n, s in enumerate(segments):
+        entries.append((s[0], (n, False)))
+        if not lines.closed(s):
+            entries.append((s[-1], (n, True)))
+    grid = _Grid(entries)
+    keys = {n: [(n, False), (n, True)] for n in range(len(segments))}
+    pos = start
+    rv = []
+    while len(grid):
+        _, (n, rev) = grid.nearest(pos)
+        for key in keys[n]:
+            if key in grid.where:
+                grid.remove(key)
+        s = segments[n]
+        if rev:
+            s = list(reversed(s))
+        rv.append(s)
+        pos = s[-1]
+    return rv
+
+
+def twoopt(segments, start=(0.0, 0.0), timelimit=1.0):
+    """
+    Improve a cutting order by reversing parts of it (2-opt).
+
+    Reversing the order of a run of segments also reverses the direction of
+    the open segments in it. Each pass is O(n²); the search stops when a
+    pass finds no improvement or when the time limit is reached.
+
+    Arguments:
+        segments: List of segments, in cutting order.
+        start: Position of the head before the first cut.
+        timelimit: Maximum time to spend in seconds.
+
+    Returns:
+        A new list of segments.
+    """
+    route = list(segments)
+    n = len(route)
+    entry = [s[0] for s in route]
+    exit = [s[-1] for s in route]
+    deadline = time.monotonic() + timelimit
+
+    def dist(p, q):
+        return math.hypot(q[0] - p[0], q[1] - p[1])
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            if time.monotonic() > deadline:
+                return route
+            a = exit[i - 1] if i > 0 else start
+            for j in range(i + 1, n):
+                old = dist(a, entry[i])
+                new = dist(a, exit[j])
+                if j + 1 < n:
+                    old += dist(exit[j], entry[j + 1])
+                    new += dist(entry[i], entry[j + 1])
+                if new < old - 1e-9:
+                    route[i : j + 1] = [_reverse(s) for s in reversed(route[i : j + 1])]
+                    entry[i : j + 1] = [s[0] for s in route[i : j + 1]]
+                    exit[i : j + 1] = [s[-1] for s in route[i : j + 1]]
+                    improved = True
+    return route
+
+
+def order(segments, start=(0.0, 0.0), timelimit=1.0):
+    """
+    Order segments to minimize the travel between cuts.
+
+    A nearest neighbour ordering is refined with 2-opt.
+
+    Arguments:
+        segments: List of segments.
+        start: Position of the head before the first cut.
+        timelimit: Maximum time to spend on 2-opt, in seconds.
+
+    Returns:
+        A new list of segments.
+    """
+    return twoopt(nearest(segments, start), start, timelimit)
+
+
+def _corners(pts, limit):
+    """
+    Find the corners of a closed polygon.
+
+    Arguments:
+        pts: List of vertices, without the closing point.
+        limit: Change of direction in degrees.
+
+    Returns:
+        List of the vertices where the direction changes more than limit,
+        like gerbernc.Writer does when it decides to lift the knife.
+    """
+    rv = []
+    for a, b, c in zip(pts[-1:] + pts[:-1], pts, pts[1:] + pts[:1]):
+        ux, uy = b[0] - a[0], b[1] - a[1]
+        vx, vy = c[0] - b[0], c[1] - b[1]
+        turn = abs(math.degrees(math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)))
+        if turn > limit:
+            rv.append(b)
+    return rv
+
+
+def startpoints(segments, start=(0.0, 0.0), corner=None):
+    """
+    Start closed segments at the vertex nearest to the end of the previous cut.
+
+    Arguments:
+        segments: List of segments, in cutting order.
+        start: Position of the head before the first cut.
+        corner: If not None, prefer vertices where the direction changes
+            more than this many degrees, if the segment has any.
+
+    Returns:
+        A new list of segments.
+    """
+    pos = start
+    rv = []
+    for s in segments:
+        if len(s) > 2 and lines.closed(s):
+            s = list(s)
+            pts = s[:-1]
+            if corner is not None:
+                pts = _corners(pts, corner) or pts
+            p = min(pts, key=lambda q: math.hypot(q[0] - pos[0], q[1] - pos[1]))
+            lines.setstart(s, p)
+        rv.append(s)
+        pos = s[-1]
+    return rv
+
+
+def _clip(pts, limit):
+    """
+    Split a segment at a vertical line.
+
+    Arguments:
+        pts: List of (x, y) tuples.
+        limit: X coordinate of the line.
+
+    Returns:
+        A list of the pieces left of or on the line, and a list of the pieces
+        right of the line.
+    """
+    pieces, cur = [], [pts[0]]
+    left = pts[0][0] <= limit
+    for a, b in zip(pts, pts[1:]):
+        if (b[0] <= limit) == left:
+            cur.append(b)
+            continue
+        t = (limit - a[0]) / (b[0] - a[0])
+        p = (limit, a[1] + t * (b[1] - a[1]))
+        cur.append(p)
+        pieces.append((left, cur))
+        cur, left = [p, b], not left
+    pieces.append((left, cur))
+    # A closed segment that is split should not be split at its start.
+    if len(pieces) > 2 and pieces[0][0] == left and lines.closed(pts):
+        pieces[0] = (left, cur + pieces[0][1][1:])
+        pieces.pop()
+    pieces = [(isleft, p) for isleft, p in pieces if len(p) > 2 or p[0] != p[-1]]
+    inside = [p for isleft, p in pieces if isleft]
+    outside = [p for isleft, p in pieces if not isleft]
+    return inside, outside
+
+
+def bites(bylayer, window):
+    """
+    Divide the segments of a marker over bites of the conveyor.
+
+    All bites have the length of the window, and the first bite starts at
+    X = 0. So the conveyor always moves the same distance, that is given to
+    the controller once as the bite length. Segments that extend past the
+    end of a bite are split there; the rest is cut in the next bite.
+
+    Arguments:
+        bylayer: Dict of lists of segments per layer.
+        window: Length of the cutting window in the X direction.
+
+    Returns:
+        A list with a dict of lists of segments per layer for every bite, and
+        a list of (start, number of split segments) for every bite. Layers
+        without segments in a bite are left out of it. A bite without any
+        segments is kept, since the conveyor still has to move.
+    """
+    if window <= 0:
+        raise ValueError("window must be positive")
+    rest = {k: [list(s) for s in v if len(s) > 1] for k, v in bylayer.items()}
+    rv, info = [], []
+    while any(rest.values()):
+        start = len(rv) * window
+        limit = start + window
+        bite, split = {}, 0
+        for k, v in rest.items():
+            cut, remain = [], []
+            for s in v:
+                if max(p[0] for p in s) <= limit:
+                    cut.append(s)
+                    continue
+                inside, outside = _clip(s, limit)
+                if inside:
+                    split += 1
+                cut += inside
+                remain += outside
+            if cut:
+                bite[k] = cut
+            rest[k] = remain
+        rv.append(bite)
+        info.append((start, split))
+    return rv, info
+
+
+def innerfirst(segments):
+    """
+    Cut segments that lie inside a closed segment before that segment.
+
+    The order is kept as much as possible; a closed segment is only moved to
+    just after the last segment inside it.
+
+    Arguments:
+        segments: List of segments, in cutting order.
+
+    Returns:
+        A new list of segments, and the number of segments that lie inside
+        another.
+    """
+    parent = lines.nesting(segments)
+    pending = [0] * len(segments)
+    for p in parent:
+        if p is not None:
+            pending[p] += 1
+    rv, waiting = [], set()
+    for k in range(len(segments)):
+        if pending[k]:
+            waiting.add(k)
+            continue
+        while k is not None:
+            rv.append(segments[k])
+            k = parent[k]
+            if k is None:
+                break
+            pending[k] -= 1
+            if pending[k] or k not in waiting:
+                break
+            waiting.discard(k)
+    return rv, sum(p is not None for p in parent)
@@ -76,7 +76,7 @@ def printent(e, v):
             elif k == 42:
                 b = v
             elif k == 70:
-                if v == "1":
+                if int(v) & 1:
                     closed = "closed"
         if b:
             print(f"    x: {x}, y: {y}, b: {b}")
@@ -109,11 +109,18 @@ def printent(e, v):
         printdict[k]()
     except KeyError:
         if v:
-            print("  {} entity: {}".format(k, e))
+            print("  {} entity: {}".format(k, tuple(e)))
         else:
             print("  {} entity".format(k))
 
 
+def echo(data):
+    """Print (group, data) tuples while passing them on."""
+    for d in data:
+        pprint.pprint(d)
+        yield d
+
+
 def process_arguments():
     parser = argparse.ArgumentParser(description=__doc__)
     argtext1 = "show details of unknown entities"
@@ -159,20 +166,23 @@ def main():
     for f in ut.xpand(args.files):
         print("Filename: {}".format(f))
         try:
-            data = dx.parse(f)
-            if args.verbose:
-                for d in data:
-                    pprint.pprint(d)
-            entities = dx.entities(data)
+            with open(f, encoding="cp1252") as dxffile:
+                data = dx.tokenize(dxffile)
+                if args.verbose:
+                    data = echo(data)
+                entities = list(dx.iterentities(data))
+                if args.verbose:
+                    # Also print what comes after the ENTITIES section.
+                    for _ in data:
+                        pass
         except Exception as ex:
             logging.info("skipping file {}: {}".format(f, ex))
             continue
+        index = dx.layerindex(entities)
         if not args.all:
-            numbered = dx.numberedlayers(entities)
-            bylayer = {nm: dx.fromlayer(entities, nm) for nm in numbered}
-            entities = []
-            for layerent in bylayer.values():
-                entities += layerent
+            numbered = dx.numbered(index)
+            index = {nm: index[nm] for nm in numbered}
+            entities = [e for layerent in index.values() for e in layerent]
         num = len(entities)
         if num == 0:
             logging.warning("no entities found!")
@@ -180,11 +190,10 @@ def main():
         print("Contains: {} entities".format(num))
         if args.verbose:
             for e in entities:
-                pprint.pprint(e)
-        layers = dx.layernames(entities)
-        for layer in layers:
+                pprint.pprint(tuple(e))
+        for layer in sorted(index):
             print('Layer: "{}"'.format(layer))
-            for e in dx.fromlayer(entities, layer):
+            for e in index[layer]:
                 printent(e, args.verbose)
 
 
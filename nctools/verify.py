@@ -0,0 +1,188 @@
+# file: verify.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Copyright © 2026 R.F. Smith <rsmith@xs4all.nl>. All rights reserved.
+# Created: 2026-10-18T17:05:12+0200
+# Last modified: 2026-10-18T17:05:12+0200
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY AUTHOR AND CONTRIBUTORS "AS IS" AND ANY EXPRESS
+# OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.  IN
+# NO EVENT SHALL AUTHOR OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE,
+# EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Compare the cuts in an NC program with the segments of a drawing.
+
+Both sets of segments are sampled at intervals no longer than the tolerance.
+Samples that are not within the tolerance of the other set are grouped into
+gaps. Circles in the drawing can be drilled instead of cut.
+"""
+
+import math
+from nctools import lines
+
+
+class _Edges:
+    """Grid of straight line pieces for finding the pieces near a point."""
+
+    def __init__(self, segments, tolerance):
+        """
+        Create the grid.
+
+        Arguments:
+            segments: Iterable of segments; lists of (x, y) tuples.
+            tolerance: Maximum distance of a point to a piece in mm.
+        """
+        self.tolerance = tolerance
+        # A point within the tolerance of a piece is at most one cell away
+        # from a point on the piece at the sampling interval of the cells.
+        self.size = size = 2 * tolerance
+        self.cells = {}
+        for seg in segments:
+            pts = list(seg)
+            for a, b in zip(pts, pts[1:]):
+                dx, dy = b[0] - a[0], b[1] - a[1]
+                n = math.ceil(math.hypot(dx, dy) / size)
+                cells = set()
+                for k in range(n + 1):
+                    t = k / n if n else 0.0
+                    ci = math.floor((a[0] + t * dx) / size)
+                    cj = math.floor((a[1] + t * dy) / size)
+                    for i in (ci - 1, ci, ci + 1):
+                        for j in (cj - 1, cj, cj + 1):
+                            cells.add((i, j))
+                piece = (a[0], a[1], dx, dy, dx * dx + dy * dy)
+                for c in cells:
+                    self.cells.setdefault(c, []).append(piece)
+
+    def near(self, p):
+        """Return True if p is within the tolerance of a piece."""
+        x, y = p
+        size = self.size
+        c = (math.floor(x / size), math.floor(y / size))
+        limit = self.tolerance * self.tolerance
+        for ax, ay, dx, dy, ll in self.cells.get(c, ()):
+            px, py = x - ax, y - ay
+            if ll > 0:
+                t = min(max((px * dx + py * dy) / ll, 0.0), 1.0)
+                px, py = px - t * dx, py - t * dy
+            if px * px + py * py <= limit:
+                return True
+        return False
+
+
+def _samples(pts, tolerance):
+    """
+    Sample a segment.
+
+    Arguments:
+        pts: List of (x, y) tuples.
+        tolerance: Maximum distance between samples.
+
+    Returns:
+        A list of samples and a list of the length of the segment that each
+        sample represents.
+    """
+    samples = [pts[0]]
+    for a, b in zip(pts, pts[1:]):
+        dx, dy = b[0] - a[0], b[1] - a[1]
+        n = math.ceil(math.hypot(dx, dy) / tolerance)
+        samples += [(a[0] + k / n * dx, a[1] + k / n * dy) for k in range(1, n + 1)]
+    steps = [math.dist(p, q) for p, q in zip(samples, samples[1:])]
+    weights = [(a + b) / 2 for a, b in zip([0.0] + steps, steps + [0.0])]
+    return samples, weights
+
+
+def uncovered(segments, cuts, tolerance=1.0):
+    """
+    Find the parts of segments that are not within tolerance of the cuts.
+
+    Arguments:
+        segments: Iterable of segments; lists of (x, y) tuples.
+        cuts: Iterable of segments to compare with.
+        tolerance: Maximum distance in mm.
+
+    Returns:
+        A list of (length, points) tuples for every gap. The points are the
+        samples in the gap.
+    """
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive")
+    grid = _Edges(cuts, tolerance)
+    rv = []
+    for seg in segments:
+        pts = list(seg)
+        if not pts:
+            continue
+        samples, weights = _samples(pts, tolerance)
+        gap, length = [], 0.0
+        for p, w in zip(samples, weights):
+            if grid.near(p):
+                if gap:
+                    rv.append((length, gap))
+                    gap, length = [], 0.0
+            else:
+                gap.append(p)
+                length += w
+        if gap:
+            rv.append((length, gap))
+    return rv
+
+
+def compare(segments, cuts, tolerance=1.0):
+    """
+    Compare the segments of a drawing with the cuts of an NC program.
+
+    Arguments:
+        segments: Iterable of segments from the drawing.
+        cuts: Iterable of cut segments.
+        tolerance: Maximum distance in mm.
+
+    Returns:
+        A tuple of the gaps in the drawing that are not cut and the gaps in
+        the cuts that are not in the drawing. See uncovered.
+    """
+    segments, cuts = list(segments), list(cuts)
+    return uncovered(segments, cuts, tolerance), uncovered(cuts, segments, tolerance)
+
+
+def drilled(segments, holes, tolerance=1.0):
+    """
+    Match circles in a drawing with drilled holes.
+
+    Arguments:
+        segments: Iterable of segments from the drawing.
+        holes: List of (x, y) positions of drilled holes.
+        tolerance: Maximum distance in mm between a hole and the center.
+
+    Returns:
+        A list of the segments that are not matched by a hole, and a list of
+        the holes that do not match a circle.
+    """
+    rest, unmatched = [], list(holes)
+    for s in segments:
+        c = lines.circle(s) if unmatched else None
+        if c:
+            (cx, cy), _ = c
+            near = [
+                h for h in unmatched if math.hypot(h[0] - cx, h[1] - cy) <= tolerance
+            ]
+            if near:
+                unmatched.remove(near[0])
+                continue
+        rest.append(s)
+    return rest, unmatched
@@ -0,0 +1,38 @@
+# file: test_cache.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T10:41:07+0200
+# Last modified: 2026-10-18T10:41:07+0200
+"""Tests for the cache module."""
+
+import io
+import os
+import sys
+
+sys.path.insert(1, ".")
+
+from nctools import cache  # noqa
+
+
+def test_dump_load():
+    bylayer = {
+        "deel 1": [[(0.0, 0.0), (100.0, 0.0)], [(1.5, 2.25), (3.0, 4.0), (5.0, 6.125)]],
+        "deel 2": [],
+    }
+    f = io.BytesIO()
+    cache.dump(bylayer, f)
+    f.seek(0)
+    rv = cache.load(f)
+    assert {k: v.tolist() for k, v in rv.items()} == bylayer
+
+
+def test_segments(tmp_path):
+    fn = "testfiles/demo.dxf"
+    direct = cache.segments(fn)
+    first = cache.segments(fn, cachedir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    second = cache.segments(fn, cachedir=tmp_path)
+    assert direct == first == second
+    cache.evict(tmp_path, maxsize=0)
+    assert os.listdir(tmp_path) == []
@@ -70,3 +70,56 @@ def test_layernames():
 def test_numberedlayers():
     numnames = dxf.numberedlayers(ents)
     assert numnames == ["deel 1"]
+
+
+def test_tokenize():
+    lines = ["  0\n", "SECTION\n", "  2\n", "ENTITIES\n", "  0\n", "EOF\n"]
+    assert list(dxf.tokenize(lines)) == [(0, "SECTION"), (2, "ENTITIES"), (0, "EOF")]
+
+
+def test_iterentities():
+    with open("testfiles/demo.dxf", encoding="cp1252") as dxffile:
+        stream = dxf.iterentities(dxf.tokenize(dxffile))
+        first = next(stream)
+        rest = list(stream)
+    assert first == ents[0]
+    assert len(rest) == 15
+    assert rest[-1] == ents[-1]
+
+
+def test_readentities_mmap():
+    fast = dxf.readentities("testfiles/demo.dxf", backend="mmap")
+    assert len(fast) == len(ents)
+    for e, f in zip(ents, fast):
+        assert [g for g, _ in e] == [g for g, _ in f]
+        for (g, d), (_, fd) in zip(e, f):
+            if g < 10:
+                assert fd == d
+            else:
+                assert fd.decode("cp1252") == d
+
+
+def test_entity():
+    e = dxf.Entity(
+        ((0, "LWPOLYLINE"), (8, "deel 2"), (10, "0"), (20, "0"), (10, "5"), (20, "1"))
+    )
+    assert e.kind == "LWPOLYLINE"
+    assert e.layer == "deel 2"
+    assert dxf.layername(e) == "deel 2"
+    assert dxf.bycode(e, 0) == "LWPOLYLINE"
+    assert dxf.bycode(e, 10) == ["0", "5"]
+    assert dxf.bycode(e, 42) == []
+    assert e.getall(20) == ["0", "1"]
+    assert e.get(10) == "0"
+    assert e == tuple(e)
+    assert len(e) == 6
+
+
+def test_layerindex():
+    e1 = dxf.Entity(((0, "LINE"), (8, "deel 10")))
+    e2 = dxf.Entity(((0, "LINE"), (8, "0")))
+    e3 = dxf.Entity(((0, "ARC"), (8, "deel 2")))
+    e4 = dxf.Entity(((0, "LINE"), (8, "deel 10")))
+    index = dxf.layerindex([e1, e2, e3, e4])
+    assert index == {"deel 10": [e1, e4], "0": [e2], "deel 2": [e3]}
+    assert dxf.numbered(index) == ["deel 2", "deel 10"]
@@ -0,0 +1,252 @@
+# file: test_gerbernc.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T15:02:44+0200
+# Last modified: 2026-10-18T15:02:44+0200
+"""Tests for the gerbernc module."""
+
+import math
+import sys
+
+import pytest
+
+sys.path.insert(1, ".")
+
+from nctools import gerbernc  # noqa
+
+
+def test_quantize():
+    pts = [(0, 0), (0.1, 0.1), (25.4, 0), (25.4, -0.1), (25.4, -0.2)]
+    assert gerbernc.quantize(pts) == [(0, 0), (100, 0), (100, -1)]
+
+
+def test_cut_polyline(tmp_path):
+    path = tmp_path / "test"
+    w = gerbernc.Writer(str(path))
+    w.newpiece()
+    w.cut_polyline([(0, 0), (25.4, 0), (25.41, 0), (25.4, 50.8), (0, 0)])
+    w.cut_polyline([(0, 0), (0.01, 0.01)])
+    w.newpiece()
+    assert w.bbox == (0, 0, 100, 200)
+    w.write()
+    commands = path.read_text().split("*")
+    assert commands == [
+        "H1",
+        "M20",
+        "test/L=0001.000/W=0002.000",
+        "M15",
+        "N1",
+        "X0Y0",
+        "M14",
+        "X100Y0",
+        "M15",
+        "M14",
+        "X100Y200",
+        "M15",
+        "M14",
+        "X0Y0",
+        "M15",
+        "M0",
+        "",
+    ]
+
+
+def test_writer_empty(tmp_path):
+    path = tmp_path / "empty"
+    with gerbernc.Writer(str(path)) as w:
+        w.newpiece()
+    assert path.read_text() == "H1*M20*empty/L=0000.000/W=0000.000*M15*M0*"
+
+
+def test_writer_error(tmp_path):
+    path = tmp_path / "test"
+    path.write_text("old")
+    with pytest.raises(ValueError, match="unknown position"):
+        with gerbernc.Writer(str(path)) as w:
+            w.newpiece()
+            assert path.read_text() == "old"
+            w.down()
+    with pytest.raises(ValueError, match="too large"):
+        with gerbernc.Writer(str(path)) as w:
+            w.cut_polyline([(0, 0), (1e12, 0)])
+    # The old file is kept, and no temporary file is left.
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["test"]
+
+
+def test_writer_bite(tmp_path):
+    path = tmp_path / "test"
+    with pytest.raises(ValueError, match="bite length"):
+        with gerbernc.Writer(str(path)) as w:
+            w.advance()
+    with gerbernc.Writer(str(path), bite=1300) as w:
+        w.cut_polyline([(0, 0), (25.4, 0)])
+        w.advance()
+        w.cut_polyline([(0, 0), (25.4, 0)])
+    text = path.read_text()
+    assert text.startswith("H1*X0Z5118*M20*")
+    assert text.count("M69*") == 1
+    assert gerbernc.parse("X0Z5118") == gerbernc.Command("bite", "X0Z5118", (0, 5118))
+
+
+def test_bbox(tmp_path):
+    w = gerbernc.Writer(str(tmp_path / "test"))
+    w.cut_polyline([(25.4, 25.4), (50.8, 0), (0, 50.8)])
+    w.write()
+    assert w.bbox == (0, 0, 200, 200)
+
+
+def test_cut_polyline_lifts(tmp_path):
+    # A star with 200 points, and a hexagon with changes of direction of
+    # exactly the default angle limit of 60°.
+    star = [
+        (
+            (300 if n % 2 else 100) * math.cos(n * math.pi / 100),
+            (300 if n % 2 else 100) * math.sin(n * math.pi / 100),
+        )
+        for n in range(201)
+    ]
+    hexagon = [
+        (50 * math.cos(n * math.pi / 3), 50 * math.sin(n * math.pi / 3))
+        for n in range(7)
+    ]
+    paths = [tmp_path / "a", tmp_path / "b"]
+    w = gerbernc.Writer(str(paths[0]))
+    for s in (star, hexagon, hexagon * 40):
+        w.moveto(*s[0])
+        w.down()
+        for p in s[1:]:
+            w.moveto(*p)
+        w.up()
+    w.write()
+    w = gerbernc.Writer(str(paths[1]))
+    for s in (star, hexagon, hexagon * 40):
+        w.cut_polyline(s)
+    w.write()
+    a, b = [p.read_text() for p in paths]
+    assert a.count("M15*M14") > 200
+    assert a.replace("a/L=", "b/L=") == b
+
+
+def test_commands(tmp_path):
+    path = tmp_path / "test"
+    path.write_text("H1*M20*test/L=1.000/W=2.000*M15*N1*X0Y0*M14*X100Y-2*M15*M0*")
+    cmds = list(gerbernc.commands(str(path), chunksize=4))
+    assert cmds == path.read_text().split("*")[:-1]
+    records = list(gerbernc.read(str(path)))
+    assert [r.kind for r in records] == [
+        "code",
+        "code",
+        "text",
+        "up",
+        "piece",
+        "move",
+        "down",
+        "move",
+        "up",
+        "stop",
+    ]
+    assert records[0].args == ("H", "1")
+    assert records[4].args == (1,)
+    assert records[7].args == (100, -2)
+    assert list(gerbernc.segments(str(path))) == [[(0.0, 0.0), (25.0, -1.0)]]
+
+
+def test_parse_name(tmp_path):
+    # Program names that look a bit like moves are text.
+    for text in ("XMAS-YOKE-Y2/L=0001.000/W=0002.000", "X1Y2Y3", "X1.2.3Y4"):
+        assert gerbernc.parse(text) == gerbernc.Command("text", text, ())
+    assert gerbernc.parse("X-10Y2.5").args == (-10, 2.5)
+    path = tmp_path / "XMAS-YOKE-Y2"
+    with gerbernc.Writer(str(path)) as w:
+        w.cut_polyline([(0, 0), (25.4, 0)])
+    assert list(gerbernc.program(str(path)).cuts()) == [[(0.0, 0.0), (25.4, 0.0)]]
+
+
+def test_program(tmp_path):
+    path = tmp_path / "test"
+    # Two cuts joined by a corner lift, a move and a third cut.
+    text = "H1*M20*test/L=1.000/W=2.000*N1*M15*X100Y0*M14*X200Y0*M15*M14*X200Y100*"
+    text += "M15*N2*X0Y100*M14*X0Y0*M15*M0*"
+    path.write_text(text)
+    prog = gerbernc.program(str(path))
+    assert len(prog) == 6
+    assert prog.down.tolist() == [0, 0, 1, 1, 0, 1]
+    assert prog.pieces.tolist() == [1, 4]
+    assert prog.bbox() == (0.0, 0.0, 50.8, 25.4)
+    assert math.isclose(prog.cutlength(), 76.2)
+    assert math.isclose(prog.travel(), 25.4 + 50.8)
+    cuts = prog.cuts()
+    assert len(cuts) == 2
+    assert cuts[0] == [(25.4, 0.0), (50.8, 0.0), (50.8, 25.4)]
+    assert cuts[1] == [(0.0, 25.4), (0.0, 0.0)]
+
+
+def test_sharpen(tmp_path):
+    path = tmp_path / "test"
+    w = gerbernc.Writer(str(path), sharpen=150)
+    w.newpiece()
+    # Square with sides of 100 mm; the knife is lifted in every corner.
+    square = [(0, 0), (101.6, 0), (101.6, 101.6), (0, 101.6), (0, 0)]
+    w.cut_polyline(square)
+    w.cut_polyline([(200, 0), (300, 0)])
+    w.write()
+    assert w.sharpens == 4
+    assert math.isclose(w.cutlen, 4 * 101.6 + 100.076)
+    text = path.read_text()
+    assert text.startswith("H1*M20*test/L=0011.810/W=0004.000*M15*M41*N1*")
+    assert text.count("M15*M42*M14") == 3
+    assert "X787Y0*M42*M14" in text
+    assert text.endswith("M15*M40*M0*")
+
+
+def test_slowradius(tmp_path):
+    path = tmp_path / "test"
+    w = gerbernc.Writer(str(path), slowradius=20)
+    # A straight line followed by a quarter circle with a radius of 10 mm.
+    arc = [(10 * math.sin(a / 10), 10 - 10 * math.cos(a / 10)) for a in range(16)]
+    w.cut_polyline([(-50, 0)] + arc)
+    w.write()
+    cmds = path.read_text().split("*")
+    assert cmds.count("M25") == 1 and cmds.count("M26") == 1
+    assert cmds.index("M25") == cmds.index("M14") + 2
+    assert cmds.index("M26") == cmds.index("M15", 4) - 1
+    assert math.isclose(w.slowlen / w.cutlen, 15 / 65, rel_tol=0.05)
+
+
+def test_plunge(tmp_path):
+    square = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    triangle = [(200, 0), (300, 0), (250, 86.6), (200, 0)]
+    paths = [tmp_path / "a", tmp_path / "b"]
+    w = gerbernc.Writer(str(paths[0]), plunge=100)
+    for s in (square, triangle):
+        w.moveto(*s[0])
+        w.down()
+        for p in s[1:]:
+            w.moveto(*p)
+        w.up()
+    w.write()
+    assert (w.lifts, w.plunges) == (2, 3)
+    w = gerbernc.Writer(str(paths[1]), plunge=100)
+    for s in (square, triangle):
+        w.cut_polyline(s)
+    w.write()
+    assert (w.lifts, w.plunges) == (2, 3)
+    a, b = [p.read_text() for p in paths]
+    assert a.count("M46") == 3 and a.count("M15*M14") == 2
+    assert a.replace("a/L=", "b/L=") == b
+
+
+def test_drill(tmp_path):
+    path = tmp_path / "test"
+    w = gerbernc.Writer(str(path))
+    w.newpiece()
+    w.drill(25.4, 25.4)
+    w.cut_polyline([(0, 0), (50.8, 0)])
+    w.drill(0, 0)
+    w.write()
+    assert w.drills == 2
+    assert "N1*X100Y100*M43*X0Y0*M14*X200Y0*M15*X0Y0*M43*M15*M0*" in path.read_text()
+    prog = gerbernc.program(str(path))
+    assert prog.holes.tolist() == [1, 4]
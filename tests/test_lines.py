@@ -6,6 +6,7 @@
 # Last modified: 2018-01-23 22:02:50 +0100
 """Tests for the lines module."""
 
+import math
 import sys
 
 sys.path.insert(1, ".")
@@ -130,3 +131,148 @@ def test_setstart():
     lines.setstart(closedseg, (100, 100))
     ev = [(100, 100), (0, 100), (0, 0), (100, 0), (100, 100)]
     assert closedseg == ev
+
+
+def test_combine_segments_reversed():
+    segments = [
+        [(10, 0), (20, 0)],
+        [(0, 0), (10, 0.1)],
+        [(30, 0), (20.1, 0)],
+        [(30, 10), (30.2, 0.2)],
+        [(-10, 0), (0, 0.1)],
+    ]
+    loops, openseg = lines.combine_segments(segments)
+    assert loops == []
+    assert openseg == [[(-10, 0), (0, 0), (10, 0), (20, 0), (30, 0), (30, 10)]]
+
+
+def test_segments():
+    seglist = [
+        [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)],
+        [(0, 50), (50, 0)],
+    ]
+    store = lines.Segments(seglist)
+    assert len(store) == 2
+    assert store.npoints() == 7
+    assert store.tolist() == seglist
+    assert store[1] == seglist[1]
+    assert store[0][1:3] == [(100, 0), (100, 100)]
+    assert list(reversed(store[1])) == [(50, 0), (0, 50)]
+    assert store.bboxes() == [(0, 0, 100, 100), (0, 0, 50, 50)]
+    assert store.bbox() == (0, 0, 100, 100)
+    assert store.closed() == [True, False]
+    assert store.lengths()[0] == 400
+    assert lines.length(store[0]) == 400
+    assert lines.closed(store[0]) is True
+    assert lines.bbox(store[1]) == (0, 0, 50, 50)
+
+
+def test_mksegments_circle():
+    circle = [
+        (
+            (0, "CIRCLE"),
+            (8, "deel 1"),
+            (10, "100.0"),
+            (20, "50.0"),
+            (30, "0.0"),
+            (40, "10.0"),
+        ),
+        ((0, "CIRCLE"), (8, "deel 1"), (10, "0.0"), (20, "0.0"), (40, "0.2")),
+    ]
+    rv = lines.mksegments(circle)
+    assert len(rv) == 2
+    big, small = rv
+    assert big[0] == big[-1] == (110.0, 50.0)
+    assert len(big) > 5
+    assert all(abs(math.hypot(x - 100, y - 50) - 10) < 1e-3 for x, y in big)
+    assert len(small) == 5 and small[0] == small[-1]
+    (cx, cy), R = lines.circle(big)
+    assert round(cx, 6) == 100 and round(cy, 6) == 50 and round(R, 3) == 10
+
+
+def test_circle():
+    square = [(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]
+    assert lines.circle(square) is None
+    assert lines.circle(square, tolerance=3) == ((5, 5), math.hypot(5, 5))
+    assert lines.circle([(0, 0), (10, 0), (10, 10), (0, 10)]) is None
+
+
+def test_mksegments_polyline_bulge():
+    poly = [
+        ((0, "POLYLINE"), (8, "deel 1"), (70, "0")),
+        ((0, "VERTEX"), (8, "deel 1"), (10, "0"), (20, "0"), (42, "1")),
+        ((0, "VERTEX"), (8, "deel 1"), (10, "10"), (20, "0")),
+        ((0, "SEQEND"), (8, "deel 1")),
+    ]
+    rv = lines.mksegments(poly)
+    ev = [(0, 0), (1.464, -3.536), (5, -5), (8.536, -3.536), (10, 0)]
+    assert rv == [ev]
+
+
+def test_simplify():
+    line = [(0, 0), (10, 0.1), (20, 0), (30, 0.2), (30, 10), (20, 10.6), (0, 10)]
+    assert lines.simplify(line) == [(0, 0), (30, 0.2), (30, 10), (20, 10.6), (0, 10)]
+    assert lines.simplify(line, tolerance=0.05) == line
+    # Lower the angle limit so the knife would be lifted at (20, 10.6).
+    rv = lines.simplify(line, tolerance=1.0, anglim=3.0)
+    assert rv == [(0, 0), (30, 0.2), (30, 10), (20, 10.6), (0, 10)]
+    assert lines.simplify(line, tolerance=1.0) == [(0, 0), (30, 0.2), (30, 10), (0, 10)]
+
+
+def test_nesting():
+    outer = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    hole = [(10, 10), (20, 10), (20, 20), (10, 20), (10, 10)]
+    inhole = [(12, 12), (15, 15)]
+    # A notch that starts on the outer contour.
+    notch = [(50, 0), (50, 30)]
+    other = [(200, 0), (300, 0)]
+    rv = lines.nesting([outer, hole, inhole, notch, other])
+    assert rv == [None, 0, 1, 0, None]
+
+
+def test_dedup():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    # Fine curve with edges shorter than EPSILON.
+    curve = [(200 + 20 * math.cos(a / 100), 20 * math.sin(a / 100)) for a in range(158)]
+    seg = [
+        square,
+        [(0, 0), (100, 0)],
+        [(100, 100), (100, 0)],
+        [(50, 0.1), (150, 0.1)],
+        [(0, 100), (0, 50), (-50, 50)],
+        curve,
+        list(reversed(curve)),
+    ]
+    rv, removed = lines.dedup(seg)
+    assert rv[0] is square
+    assert rv[1] == [(100.0, 0.1), (150, 0.1)]
+    assert rv[2] == [(0, 50), (-50, 50)]
+    assert rv[3] is curve
+    assert len(rv) == 4
+    assert math.isclose(removed, 300 + lines.length(curve))
+    # Long lines that cross many cells of the grid.
+    diag = [(-1000, -300), (2000, 600)]
+    rv, removed = lines.dedup([diag, [(1500, 450.1), (-500, -149.9)]])
+    assert rv == [diag]
+    assert math.isclose(removed, math.hypot(2000, 600))
+    # Huge drawings get larger cells.
+    huge = [(0, 0), (1e9, 0)]
+    rv, removed = lines.dedup([huge, list(reversed(huge))])
+    assert rv == [huge] and removed == 1e9
+
+
+def test_common():
+    left = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    right = [(100, 0), (200, 0), (200, 100), (100, 100), (100, 0)]
+    extra = [(0, 50), (50, 50)]
+    rv, removed = lines.common([[left, extra, extra], [right, extra]])
+    # Duplicates within a group are kept.
+    assert rv[0] == [left, extra, extra]
+    assert rv[1] == [[(100, 0), (200, 0), (200, 100), (100, 100)]]
+    assert math.isclose(removed, 150)
+    # A long shared edge, drawn in pieces in the second layer.
+    top = [(0, 1000), (3000, 1000)]
+    pieces = [[(x + 1000, 1000.1), (x, 1000.1)] for x in range(0, 3000, 1000)]
+    rv, removed = lines.common([[top], pieces + [[(0, 0), (0, 1000)]]])
+    assert rv == [[top], [[(0, 0), (0, 1000)]]]
+    assert math.isclose(removed, 3000)
@@ -0,0 +1,63 @@
+# file: test_machine.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T16:10:26+0200
+# Last modified: 2026-10-18T16:10:26+0200
+"""Tests for the machine module."""
+
+import sys
+
+sys.path.insert(1, ".")
+
+from nctools import gerbernc, machine  # noqa
+
+
+def test_read():
+    p = machine.read("doc/machine-parameters.txt")
+    assert p["Cut Speed=Maximum Knife Speed"] == "6"
+    assert p["Sharpening Time"] == "0.02"
+    assert p["Lift + Plunge Corner Angle"] == "45"
+    assert p["Knife Lift Time"] == machine.DEFAULTS["Knife Lift Time"]
+
+
+def test_movetime():
+    # Reaching 10 cm/s at 10 cm/s² takes 1 s and 5 cm.
+    assert machine._movetime(20, 10, 10) == 3.0
+    assert machine._movetime(2.5, 10, 10) == 1.0
+
+
+def test_estimate():
+    params = {
+        "Cut Speed=Maximum Knife Speed": "1",
+        "Dry Haul Velocity": "610",
+        "Acceleration": "1000000",
+        "Sharpen Frequency": "5",
+        "Sharpening Time": "0.5",
+        "Number of Sides to Sharpen": "2",
+    }
+    # Cut 10 inch at 305 cm/min and haul 10 inch at 610 cm/min.
+    cmds = ["H1", "M20", "test", "M15", "N1", "X0Y1000", "M14", "X1000Y1000"]
+    cmds += ["M15", "N2", "X1000Y0", "M15", "M0"]
+    times = machine.estimate(map(gerbernc.parse, cmds), params)
+    assert list(times) == [1, 2]
+    assert round(times[1]["cutting"], 2) == 5.0
+    assert round(times[2]["dry haul"], 2) == 2.5
+    # The knife is sharpened once, at the end of the block.
+    assert times[1]["sharpening"] == 1.0
+    assert times[1]["lifts"] == 0.5
+    total = machine.total(times)
+    assert round(total["dry haul"], 2) == 5.0
+
+
+def test_corners():
+    assert machine.corners(2, 4) == (1.0, 1.0)
+    params = {"Lift + Plunge (M46) Codes": "IGNORE"}
+    assert machine.corners(2, 4, params) == (1.0, 0.0)
+
+
+def test_bitelimits():
+    assert machine.bitelimits() == (1270.0, 1397.0, 762.0)
+    params = machine.read("doc/machine-parameters.txt")
+    params["Maximum Bite Length"] = "150.00"
+    assert machine.bitelimits(params) == (1270.0, 1500.0, 762.0)
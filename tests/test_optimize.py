@@ -0,0 +1,85 @@
+# file: test_optimize.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T14:12:07+0200
+# Last modified: 2026-10-18T14:12:07+0200
+"""Tests for the optimize module."""
+
+import sys
+
+sys.path.insert(1, ".")
+
+from nctools import optimize  # noqa
+
+
+def test_travel():
+    seg = [[(0, 0), (10, 0)], [(10, 3), (20, 3)], [(20, 7), (0, 7)]]
+    assert optimize.travel(seg) == 7.0
+    assert optimize.travel(seg, (0, 4)) == 11.0
+
+
+def test_nearest():
+    seg = [[(100, 0), (50, 0)], [(0, 0), (40, 0)], [(200, 0), (300, 0)]]
+    rv = optimize.nearest(seg)
+    assert rv == [[(0, 0), (40, 0)], [(50, 0), (100, 0)], [(200, 0), (300, 0)]]
+    assert optimize.travel(rv) == 110.0
+
+
+def test_nearest_closed():
+    square = [(10, 10), (20, 10), (20, 20), (10, 20), (10, 10)]
+    rv = optimize.nearest([square, [(30, 30), (15, 15)]])
+    assert rv == [square, [(15, 15), (30, 30)]]
+
+
+def test_twoopt():
+    # The second and third segment are visited in the wrong order.
+    seg = [[(0, 0), (0, 1)], [(30, 1), (30, 0)], [(10, 0), (10, 1)]]
+    seg.append([(40, 0), (40, 1)])
+    rv = optimize.twoopt(seg)
+    assert optimize.travel(rv) < optimize.travel(seg)
+    assert rv[0] == seg[0]
+    assert rv[1] == [(10, 1), (10, 0)]
+
+
+def test_startpoints():
+    # Square with an extra vertex halfway its bottom side.
+    square = [(10, 10), (15, 10), (20, 10), (20, 20), (10, 20), (10, 10)]
+    rv = optimize.startpoints([square], (16, 0))
+    assert rv[0] == [(15, 10), (20, 10), (20, 20), (10, 20), (10, 10), (15, 10)]
+    rv = optimize.startpoints([square], (16, 0), corner=60)
+    assert rv[0][0] == (20, 10)
+    assert square[0] == (10, 10)
+    # Turns of exactly the limit do not lift the knife, so are not corners.
+    rv = optimize.startpoints([square], (16, 0), corner=90)
+    assert rv[0][0] == (15, 10)
+
+
+def test_bites():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    line = [(0, 50), (250, 50)]
+    parts, info = optimize.bites(
+        {"a": [square, line], "b": [[(120, 0), (130, 0)]]}, 110
+    )
+    assert info == [(0, 1), (110, 1), (220, 0)]
+    assert parts[0] == {"a": [square, [(0, 50), (110, 50.0)]]}
+    assert parts[1] == {"a": [[(110, 50.0), (220, 50.0)]], "b": [[(120, 0), (130, 0)]]}
+    assert parts[2] == {"a": [[(220, 50.0), (250, 50)]]}
+    # A closed contour that is split in two.
+    parts, info = optimize.bites({"a": [square]}, 50)
+    assert parts[0]["a"] == [[(50, 100.0), (0, 100), (0, 0), (50, 0.0)]]
+    assert parts[1]["a"] == [[(50, 0.0), (100, 0), (100, 100), (50, 100.0)]]
+    # Bites are aligned to the window, and empty bites are kept.
+    parts, info = optimize.bites({"a": [[(10, 0), (20, 0)], [(230, 0), (240, 0)]]}, 100)
+    assert info == [(0, 0), (100, 0), (200, 0)]
+    assert parts == [{"a": [[(10, 0), (20, 0)]]}, {}, {"a": [[(230, 0), (240, 0)]]}]
+
+
+def test_innerfirst():
+    outer = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    hole = [(10, 10), (20, 10), (20, 20), (10, 20), (10, 10)]
+    inhole = [(12, 12), (15, 15)]
+    other = [(200, 0), (300, 0)]
+    rv, count = optimize.innerfirst([outer, other, hole, inhole])
+    assert rv == [other, inhole, hole, outer]
+    assert count == 2
@@ -0,0 +1,33 @@
+# file: test_verify.py
+# vim:fileencoding=utf-8:ft=python
+#
+# Author: R.F. Smith <rsmith@xs4all.nl>
+# Created: 2026-10-18T17:48:22+0200
+# Last modified: 2026-10-18T17:48:22+0200
+"""Tests for the verify module."""
+
+import math
+import sys
+
+sys.path.insert(1, ".")
+
+from nctools import verify  # noqa
+
+
+def test_match():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    # The same square, cut in another direction with a slight offset.
+    cut = [(0.3, 0.3), (0.3, 100.3), (100.3, 100.3), (100.3, 0.3), (0.3, 0.3)]
+    assert verify.compare([square], [cut]) == ([], [])
+
+
+def test_gaps():
+    square = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]
+    cuts = [[(0, 0), (100, 0), (100, 100), (0, 100)], [(200, 0), (210, 0)]]
+    missing, extra = verify.compare([square], cuts, tolerance=0.5)
+    assert len(missing) == 1
+    length, pts = missing[0]
+    assert math.isclose(length, 98.5)
+    assert pts[0] == (0.0, 99.0) and pts[-1] == (0.0, 1.0)
+    assert len(extra) == 1
+    assert math.isclose(extra[0][0], 10.0)